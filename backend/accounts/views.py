@@ -6,6 +6,7 @@ from .utils import hash_password, verify_password
 from .authentication import get_tokens_for_user
 from .permissions import IsHOD
 from bson import ObjectId
+from repository.refcache import invalidate_users
 
 
 class RegisterView(APIView):
@@ -122,6 +123,7 @@ class CreateFacultyView(APIView):
             subject_ids=[],
         )
         user.save()
+        invalidate_users()
 
         return Response({
             "message": "Faculty account created.",
@@ -149,6 +151,7 @@ class ActivateUserView(APIView):
 
         user.is_active = bool(is_active)
         user.save()
+        invalidate_users()
 
         action = "activated" if user.is_active else "deactivated"
         return Response({
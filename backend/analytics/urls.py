@@ -4,7 +4,8 @@ from .views import (
     UploadsBySemesterView,
     TopResourcesView,
     FacultyActivityView,
-    UploadsByFormatView
+    UploadsByFormatView,
+    IngestionStatsView,
 )
 
 urlpatterns = [
@@ -13,4 +14,5 @@ urlpatterns = [
     path('analytics/top-resources/', TopResourcesView.as_view()),
     path('analytics/faculty-activity/', FacultyActivityView.as_view()),
     path('analytics/uploads-by-format/', UploadsByFormatView.as_view()),
+    path('analytics/ingestion/', IngestionStatsView.as_view()),
 ]
@@ -1,10 +1,15 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+import numpy as np
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from accounts.permissions import IsHOD
 from accounts.models import User
-from repository.models import Resource, Subject
+from repository.models import Resource
+from repository.refcache import refs
 from notices.models import Notice
+from rag.models import IngestionLog
 
 class AnalyticsSummaryView(APIView):
     permission_classes = [IsAuthenticated, IsHOD]
@@ -41,17 +46,14 @@ class TopResourcesView(APIView):
         resources = list(
             Resource.objects(status='approved').order_by('-download_count')[:10]
         )
+        subjects = refs.subjects()
         data = []
         for r in resources:
-            subject_code = None
-            try:
-                subject_code = Subject.objects.get(id=r.subject_id).code
-            except Exception:
-                pass
+            subject = subjects.get(r.subject_id)
             data.append({
                 "id": str(r.id),
                 "title": r.title,
-                "subject_code": subject_code,
+                "subject_code": subject.code if subject else None,
                 "download_count": r.download_count,
             })
         return Response({"data": data})
@@ -88,3 +90,62 @@ class UploadsByFormatView(APIView):
         data.append({"format": "url", "count": url_count})
         
         return Response({"data": data})
+
+
+INGESTION_STAGES = ['extract', 'chunk', 'clone', 'embed', 'write', 'preview']
+
+
+def _stage_latency(logs):
+    """p50/p95 milliseconds per ingestion stage plus chunks/sec for a list of logs."""
+    stats = {}
+    for stage in INGESTION_STAGES + ['total']:
+        values = [
+            l.total_ms if stage == 'total' else l.stage_ms.get(stage)
+            for l in logs
+        ]
+        values = [v for v in values if v is not None]
+        if values:
+            p50, p95 = np.percentile(values, [50, 95])
+            stats[stage] = {"p50_ms": round(float(p50), 1), "p95_ms": round(float(p95), 1)}
+        else:
+            stats[stage] = {"p50_ms": None, "p95_ms": None}
+
+    total_chunks = sum(l.chunks for l in logs)
+    total_seconds = sum(l.total_ms for l in logs) / 1000
+    return {
+        "runs": len(logs),
+        "failed": sum(1 for l in logs if l.outcome == 'failed'),
+        "chunks": total_chunks,
+        "chunks_per_sec": round(total_chunks / total_seconds, 2) if total_seconds else None,
+        "stages": stats,
+    }
+
+class IngestionStatsView(APIView):
+    """
+    GET: Ingestion pipeline latency per stage (p50/p95) and throughput,
+    overall and per day for the last `days` days (default 30).
+    """
+    permission_classes = [IsAuthenticated, IsHOD]
+
+    def get(self, request):
+        try:
+            days = max(1, min(int(request.query_params.get('days', 30)), 365))
+        except ValueError:
+            return Response({"error": "Invalid days parameter."}, status=400)
+
+        since = datetime.utcnow() - timedelta(days=days)
+        logs = list(
+            IngestionLog.objects(created_at__gte=since)
+            .only('outcome', 'chunks', 'stage_ms', 'total_ms', 'created_at')
+            .order_by('created_at')
+        )
+
+        by_day = defaultdict(list)
+        for l in logs:
+            by_day[l.created_at.date().isoformat()].append(l)
+
+        return Response({
+            "days": days,
+            "summary": _stage_latency(logs),
+            "data": [{"date": day, **_stage_latency(day_logs)} for day, day_logs in by_day.items()],
+        })
@@ -0,0 +1,42 @@
+"""
+Conditional GET from version stamps.
+
+A view's ETag is a hash of the version stamps (core/versions.py) of every
+collection its response reads, plus whatever else shapes the response
+(caller scope, query string). Comparing it with If-None-Match needs no
+document reads, so unchanged lists and details answer 304 immediately.
+"""
+import hashlib
+
+from django.conf import settings
+from rest_framework.response import Response
+
+from . import versions
+
+
+def etag(stamps, *parts):
+    """Strong ETag for the current versions of `stamps` combined with `parts`."""
+    current = versions.current(*stamps, max_age=settings.SEARCH_VERSION_POLL_SECONDS)
+    digest = hashlib.sha1(repr((stamps, current, parts)).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def query_key(request):
+    """Order-independent form of the query string, for use in ETag parts."""
+    return tuple(sorted(request.query_params.lists()))
+
+
+def not_modified(request, tag):
+    """A 304 response if the request's If-None-Match matches `tag`, else None."""
+    header = request.headers.get("If-None-Match", "")
+    candidates = {t.strip()[2:] if t.strip().startswith("W/") else t.strip() for t in header.split(",")}
+    if tag in candidates:
+        return tagged(Response(status=304), tag)
+    return None
+
+
+def tagged(response, tag):
+    """Attaches the ETag; clients must revalidate before reusing the body."""
+    response["ETag"] = tag
+    response["Cache-Control"] = "private, no-cache"
+    return response
@@ -0,0 +1,22 @@
+"""
+QuerySet managers for documents that carry large vector fields.
+
+`objects` on such documents is a LeanManager, so every ordinary read leaves
+the vectors out of the projection. Code that needs them asks for the plain
+`vectors` manager explicitly, e.g. `Resource.vectors(status='approved')`.
+"""
+from mongoengine.queryset.manager import QuerySetManager
+
+
+class LeanManager(QuerySetManager):
+    """Default manager whose querysets exclude the given heavy fields."""
+
+    def __init__(self, *heavy_fields):
+        super().__init__()
+        self.heavy_fields = heavy_fields
+
+    def __get__(self, instance, owner):
+        queryset = super().__get__(instance, owner)
+        if instance is not None:
+            return queryset
+        return queryset.exclude(*self.heavy_fields)
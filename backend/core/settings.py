@@ -111,3 +111,72 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 
 STATIC_URL = "static/"
+
+# RAG / ingestion
+# Weight of the chunk-content mean in the resource-level search vector
+# (0 = metadata only, 1 = content only).
+RAG_CONTENT_VECTOR_WEIGHT = 0.0
+
+# "model" sizes chunks with the embedder's own tokenizer so each fits in its
+# max_seq_length (256 WordPiece tokens for all-MiniLM-L6-v2); "tiktoken" keeps
+# the legacy 350 cl100k-token windows. Reindex after changing.
+RAG_CHUNK_MODE = "model"
+RAG_CHUNK_MODEL_OVERLAP = 32
+
+# Search
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+# Neighbors stored per resource in resource_neighbors (see build_neighbors)
+RECOMMEND_NEIGHBORS = 50
+# Weight of BM25 keyword relevance in the blended search score
+SEARCH_KEYWORD_BLEND = 0.3
+# Search/recommend result cache (per worker); invalidated by the "resources"
+# version stamp, which workers re-read at most every POLL seconds
+SEARCH_CACHE_SIZE = 1024
+SEARCH_CACHE_TTL = 300
+SEARCH_VERSION_POLL_SECONDS = 1.0
+# A worker that is behind re-reads the changed resources; past this many it rebuilds
+SEARCH_INDEX_REPLAY_MAX = 500
+
+# Subject / user-name reference cache (per worker); invalidated by the
+# "subjects" and "users" version stamps, re-read at most every POLL seconds
+REFCACHE_POLL_SECONDS = 2.0
+
+# Resource listings (keyset pagination); totals are cached per filter set
+LISTING_PAGE_SIZE = 20
+LISTING_MAX_PAGE_SIZE = 100
+LISTING_COUNT_TTL = 600
+
+# Notice list ETags roll over at least this often, so 'is_new' flags refresh
+NOTICE_ETAG_BUCKET_SECONDS = 300
+
+# Download counters are buffered per worker and flushed as one bulk $inc
+# every FLUSH_SECONDS or after THRESHOLD downloads (0 seconds = write through)
+DOWNLOAD_FLUSH_SECONDS = 5.0
+DOWNLOAD_FLUSH_THRESHOLD = 100
+
+# Downloads: None streams from Django (with Range support); "x-accel" hands
+# the transfer to nginx (see deploy/nginx.conf), "x-sendfile" to Apache/lighttpd
+DOWNLOAD_OFFLOAD = None
+DOWNLOAD_ACCEL_PREFIX = "/protected-media/"
+
+# Resumable uploads: fixed part size and how long an unfinished session lives
+UPLOAD_PART_SIZE = 5 * 1024 * 1024
+UPLOAD_SESSION_TTL = 24 * 3600
+# A part write holds the session this long at most (a crashed writer's lock lapses)
+UPLOAD_PART_LOCK_SECONDS = 120
+
+# Previews (cached under MEDIA_ROOT/previews by file hash)
+PREVIEW_PAGES = 3
+PREVIEW_DPI = 72
+PREVIEW_THUMB_SIZE = 320
+PREVIEW_SNIPPET_CHARS = 1500
+
+# Background ingestion: worker threads per process, bulk upload limits and
+# how many texts a batched job embeds per model call
+INGESTION_WORKERS = 2
+BULK_UPLOAD_MAX_FILES = 60
+RAG_BATCH_EMBED_TEXTS = 512
+
+# Most resource ids accepted by one bulk approve/reject request
+BULK_REVIEW_MAX = 200
@@ -0,0 +1,53 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from . import versions
+
+
+@mock.patch.object(versions, "VersionStamp")
+class ChangesSinceTests(SimpleTestCase):
+    """The version_stamps collection is mocked; no database needed."""
+
+    def setUp(self):
+        patcher = mock.patch.dict(versions._seen, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def stamp(self, VersionStamp, version, log):
+        VersionStamp._get_collection.return_value.find_one.return_value = {
+            "_id": "resources", "version": version, "log": log,
+        }
+
+    def test_union_of_ids_across_bumps(self, VersionStamp):
+        self.stamp(VersionStamp, 5, [["a"], ["b"], ["c", "d"], ["d"], ["e"]])
+        self.assertEqual(versions.changes_since("resources", 2), (5, {"c", "d", "e"}))
+
+    def test_up_to_date(self, VersionStamp):
+        self.stamp(VersionStamp, 5, [["a"]])
+        self.assertEqual(versions.changes_since("resources", 5), (5, set()))
+        self.assertEqual(versions.changes_since("resources", 7), (5, set()))
+
+    def test_unnamed_change_forces_rebuild(self, VersionStamp):
+        self.stamp(VersionStamp, 4, [["a"], None, ["b"], ["c"]])
+        self.assertEqual(versions.changes_since("resources", 1), (4, None))
+        # An unnamed change older than `version` does not matter
+        self.assertEqual(versions.changes_since("resources", 2), (4, {"b", "c"}))
+
+    def test_behind_the_log_forces_rebuild(self, VersionStamp):
+        log = [[str(i)] for i in range(versions.LOG_SIZE)]
+        self.stamp(VersionStamp, 1000, log)
+        self.assertEqual(versions.changes_since("resources", 1000 - versions.LOG_SIZE - 1), (1000, None))
+        latest, changed = versions.changes_since("resources", 1000 - versions.LOG_SIZE)
+        self.assertEqual(len(changed), versions.LOG_SIZE)
+
+    def test_missing_stamp(self, VersionStamp):
+        VersionStamp._get_collection.return_value.find_one.return_value = None
+        self.assertEqual(versions.changes_since("resources", 0), (0, set()))
+        self.assertEqual(versions.changes_since("resources", 3), (0, set()))
+
+    def test_remembers_latest(self, VersionStamp):
+        self.stamp(VersionStamp, 9, [])
+        versions.changes_since("resources", 9)
+        self.assertEqual(versions.current("resources", max_age=60), (9,))
+        VersionStamp._get_collection.return_value.find.assert_not_called()
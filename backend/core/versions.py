@@ -0,0 +1,95 @@
+"""
+Cross-worker version stamps.
+
+A stamp is a counter in the `version_stamps` collection that is bumped on
+every write to the data it names (e.g. "resources"). Process-local caches
+remember the stamp they were filled at and treat any newer stamp as an
+invalidation, which works across gunicorn workers and management commands.
+
+A bump may name the ids it changed. The last LOG_SIZE bumps of each key are
+kept on the stamp itself (pushed in the same atomic update as the increment),
+so a cache that is only a few versions behind can reload just those ids via
+changes_since() instead of starting over.
+"""
+import threading
+import time
+
+import mongoengine as me
+from pymongo import ReturnDocument
+
+LOG_SIZE = 200
+
+
+class VersionStamp(me.Document):
+    key = me.StringField(primary_key=True)
+    version = me.IntField(default=0)
+    log = me.ListField()   # changed ids per bump, newest last; None = unknown change
+
+    meta = {"collection": "version_stamps"}
+
+
+_lock = threading.Lock()
+_seen = {}   # key -> (version, monotonic time read)
+
+
+def _remember(key, version):
+    with _lock:
+        if version >= _seen.get(key, (-1, 0))[0]:
+            _seen[key] = (version, time.monotonic())
+
+
+def bump(key, changed=None):
+    """
+    Increments the stamp for `key` and returns the new version. `changed`
+    lists the ids the write touched; leave it out when the change cannot be
+    described that way, and caches will reload everything.
+    """
+    entry = [str(c) for c in changed] if changed is not None else None
+    doc = VersionStamp._get_collection().find_one_and_update(
+        {"_id": key},
+        {"$inc": {"version": 1}, "$push": {"log": {"$each": [entry], "$slice": -LOG_SIZE}}},
+        upsert=True, return_document=ReturnDocument.AFTER, projection={"version": 1},
+    )
+    _remember(key, doc["version"])
+    return doc["version"]
+
+
+def current(*keys, max_age=0.0):
+    """
+    Current version of each key, as a tuple in argument order. Values read
+    less than `max_age` seconds ago are served from memory.
+    """
+    now = time.monotonic()
+    with _lock:
+        cached = {k: _seen[k][0] for k in keys if k in _seen and now - _seen[k][1] < max_age}
+    missing = [k for k in keys if k not in cached]
+    if missing:
+        found = {
+            d["_id"]: d["version"]
+            for d in VersionStamp._get_collection().find({"_id": {"$in": missing}})
+        }
+        for k in missing:
+            cached[k] = found.get(k, 0)
+            _remember(k, cached[k])
+    return tuple(cached[k] for k in keys)
+
+
+def changes_since(key, version):
+    """
+    (latest version, ids changed after `version`). The ids are None when
+    they cannot be told: too far behind, or a bump that named no ids.
+    """
+    doc = VersionStamp._get_collection().find_one({"_id": key}) or {}
+    latest, log = doc.get("version", 0), doc.get("log", [])
+    _remember(key, latest)
+    behind = latest - version
+    if behind <= 0:
+        return latest, set()
+    if behind > len(log):
+        return latest, None
+    changed = set()
+    for entry in log[-behind:]:
+        if entry is None:
+            return latest, None
+        changed.update(entry)
+    return latest, changed
@@ -3,6 +3,9 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from bson import ObjectId
 from datetime import datetime, timedelta
+import time
+from django.conf import settings
+from core import etags, versions
 from .models import Notice
 from accounts.permissions import IsFacultyOrHOD
 
@@ -32,14 +35,20 @@ class NoticeListCreateView(APIView):
         return [IsAuthenticated()]
 
     def get(self, request):
+        # 'is_new' flips with time alone, so the tag also rolls over every bucket
+        bucket = int(time.time() // settings.NOTICE_ETAG_BUCKET_SECONDS)
+        tag = etags.etag(("notices",), "notices", bucket)
+        if cached := etags.not_modified(request, tag):
+            return cached
+
         # List notices: Pinned first, then newest
         pinned = list(Notice.objects(is_pinned=True).order_by('-created_at'))
         unpinned = list(Notice.objects(is_pinned=False).order_by('-created_at'))
         all_notices = pinned + unpinned
-        return Response({
+        return etags.tagged(Response({
             "count": len(all_notices),
             "results": [serialize_notice(n) for n in all_notices]
-        })
+        }), tag)
 
     def post(self, request):
         data = request.data
@@ -63,6 +72,7 @@ class NoticeListCreateView(APIView):
                 return Response({"error": "Invalid date format for 'expires_at'."}, status=400)
 
         notice.save()
+        versions.bump("notices")
         return Response(serialize_notice(notice), status=201)
 
 
@@ -106,6 +116,7 @@ class NoticeDetailView(APIView):
                     return Response({"error": "Invalid date format for 'expires_at'."}, status=400)
 
         notice.save()
+        versions.bump("notices")
         return Response(serialize_notice(notice))
 
     def delete(self, request, notice_id):
@@ -118,4 +129,5 @@ class NoticeDetailView(APIView):
             return Response({"error": "Notice not found."}, status=404)
 
         notice.delete()
+        versions.bump("notices")
         return Response({"message": "Notice deleted."})
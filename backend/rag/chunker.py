@@ -1,7 +1,19 @@
 import tiktoken
+from django.conf import settings
+
 _enc = tiktoken.get_encoding('cl100k_base')
 
-def chunk(pages, resource_id, size=350, overlap=50):
+
+def chunk(pages, resource_id, size=350, overlap=50, mode=None):
+    """
+    Splits (page_num, text) pages into overlapping token windows.
+    mode='tiktoken' sizes windows in cl100k tokens; mode='model' sizes them with
+    the embedder's own tokenizer so every window fits in max_seq_length.
+    """
+    mode = mode or getattr(settings, 'RAG_CHUNK_MODE', 'tiktoken')
+    if mode == 'model':
+        return chunk_for_model(pages, resource_id, overlap=getattr(settings, 'RAG_CHUNK_MODEL_OVERLAP', 32))
+
     tokens, page_map = [], []
     for pg, text in pages:
         toks = _enc.encode(text)
@@ -17,6 +29,63 @@ def chunk(pages, resource_id, size=350, overlap=50):
             pgs = [p for p in page_map[i:i+size] if p]
             pg  = max(set(pgs), key=pgs.count) if pgs else None
             chunks.append({'resource_id': resource_id, 'index': len(chunks),
-                           'text': text, 'page': pg})
+                           'text': text, 'page': pg, 'tokens': len(window)})
         i += (size - overlap)
     return chunks
+
+
+def model_window():
+    """(tokenizer, usable tokens per chunk) for the loaded embedding model."""
+    from rag.embedder import get_model
+    model = get_model()
+    tokenizer = model.tokenizer
+    return tokenizer, model.max_seq_length - tokenizer.num_special_tokens_to_add()
+
+
+def chunk_for_model(pages, resource_id, overlap=32):
+    """
+    Windows sized to the embedder's max_seq_length in its own (WordPiece) tokens.
+    Text is sliced from the source via offset mappings, and windows never split
+    a word, so re-encoding a chunk yields the same token count.
+    """
+    tokenizer, size = model_window()
+
+    # (page_idx, word_key, start, end) per token across all pages
+    tokens = []
+    for p, (_, text) in enumerate(pages):
+        enc = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True, verbose=False)
+        for w, (s, e) in zip(enc.word_ids(), enc['offset_mapping']):
+            tokens.append((p, (p, w), s, e))
+
+    def same_word(j):
+        return 0 < j < len(tokens) and tokens[j][1] == tokens[j - 1][1]
+
+    chunks, i, n = [], 0, len(tokens)
+    while i < n:
+        j = end = min(i + size, n)
+        while j > i + 1 and same_word(j):
+            j -= 1
+        if same_word(j):   # a single word longer than the window
+            j = end
+
+        window = tokens[i:j]
+        parts, pgs = [], []
+        for p in sorted({t[0] for t in window}):
+            span = [t for t in window if t[0] == p]
+            parts.append(pages[p][1][span[0][2]:span[-1][3]])
+            if pages[p][0]:
+                pgs += [pages[p][0]] * len(span)
+
+        text = '\n'.join(parts).strip()
+        if len(text) > 20:
+            pg = max(set(pgs), key=pgs.count) if pgs else None
+            chunks.append({'resource_id': resource_id, 'index': len(chunks),
+                           'text': text, 'page': pg, 'tokens': len(window)})
+        if j >= n:
+            break
+
+        nxt = max(j - overlap, i + 1)
+        while nxt > i + 1 and same_word(nxt):
+            nxt -= 1
+        i = nxt
+    return chunks
@@ -0,0 +1,26 @@
+"""
+Bounded executor for background ingestion.
+
+Every upload, approval and bulk job goes through one per-process pool of
+INGESTION_WORKERS threads, so a burst of uploads queues up instead of
+starting one thread per file that all compete for the embedding model.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.INGESTION_WORKERS, thread_name_prefix='ingest'
+)
+
+
+def _run(fn, *args):
+    try:
+        fn(*args)
+    except Exception as e:
+        print(f'[RAG] Background job {fn.__name__} failed: {e}')
+
+
+def submit(fn, *args):
+    """Queues fn(*args) on the ingestion pool."""
+    return _executor.submit(_run, fn, *args)
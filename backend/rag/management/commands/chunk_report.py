@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from repository.models import Resource
+from rag.models import ResourceChunk
+from rag.chunker import chunk, model_window
+from rag.extractor import extract
+
+class Command(BaseCommand):
+    help = "Reports how many chunks exceed the embedding model's max_seq_length (and are truncated when encoded)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rechunk', action='store_true',
+            help='Re-extract and re-chunk approved resources with the current RAG_CHUNK_MODE instead of reading stored chunks.',
+        )
+        parser.add_argument('--batch-size', type=int, default=256)
+
+    def handle(self, *args, **options):
+        tokenizer, usable = model_window()
+        limit = usable + tokenizer.num_special_tokens_to_add()
+
+        if options['rechunk']:
+            mode = getattr(settings, 'RAG_CHUNK_MODE', 'tiktoken')
+            self.stdout.write(self.style.NOTICE(f'Re-chunking approved resources (mode={mode})...'))
+            texts = (
+                c['text']
+                for r in Resource.objects(status='approved')
+                for c in chunk(extract(r), str(r.id))
+            )
+        else:
+            self.stdout.write(self.style.NOTICE('Reading stored chunks...'))
+            texts = (c.chunk_text for c in ResourceChunk.objects.only('chunk_text'))
+
+        total = truncated = wasted = longest = 0
+        batch = []
+
+        def flush():
+            nonlocal total, truncated, wasted, longest
+            lengths = [len(ids) for ids in tokenizer(batch, verbose=False)['input_ids']]
+            for n in lengths:
+                total += 1
+                longest = max(longest, n)
+                if n > limit:
+                    truncated += 1
+                    wasted += n - limit
+            batch.clear()
+
+        for text in texts:
+            batch.append(text)
+            if len(batch) >= options['batch_size']:
+                flush()
+        if batch:
+            flush()
+
+        if not total:
+            self.stdout.write(self.style.WARNING('No chunks found.'))
+            return
+
+        self.stdout.write(f'max_seq_length:    {limit} tokens (incl. special tokens)')
+        self.stdout.write(f'chunks:            {total}')
+        self.stdout.write(f'longest chunk:     {longest} tokens')
+        self.stdout.write(f'truncated chunks:  {truncated} ({truncated / total:.1%})')
+        self.stdout.write(f'tokens discarded:  {wasted}')
+        style = self.style.WARNING if truncated else self.style.SUCCESS
+        self.stdout.write(style('Set RAG_CHUNK_MODE = "model" and reindex to remove truncation.' if truncated
+                                else 'No chunk exceeds the model window.'))
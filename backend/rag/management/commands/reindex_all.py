@@ -1,8 +1,6 @@
 from django.core.management.base import BaseCommand
 from repository.models import Resource
-from repository.views import generate_embedding
 from rag.pipeline import process
-import time
 
 class Command(BaseCommand):
     help = 'Reruns all indexing (embeddings and RAG pipeline) for all approved resources'
@@ -14,20 +12,11 @@ class Command(BaseCommand):
 
         for i, r in enumerate(resources):
             self.stdout.write(f'[{i+1}/{total}] Re-indexing "{r.title}" ({r.id})...')
-            
-            # 1. Update status to reflect in frontend
-            Resource.objects(id=r.id).update_one(set__indexing_status='processing')
-            
-            # 2. Rerun semantic search embedding (synchronously here)
-            try:
-                generate_embedding(str(r.id))
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f'  - Embedding failed: {e}'))
 
-            # 3. Rerun RAG pipeline (synchronously here)
+            # Single pass: resource embedding + RAG chunks (synchronously here)
             try:
-                process(str(r.id), r.status)
+                process(str(r.id))
             except Exception as e:
-                self.stdout.write(self.style.ERROR(f'  - RAG pipeline failed: {e}'))
+                self.stdout.write(self.style.ERROR(f'  - Ingestion failed: {e}'))
 
         self.stdout.write(self.style.SUCCESS(f'Successfully re-indexed {total} resources.'))
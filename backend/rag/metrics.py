@@ -0,0 +1,41 @@
+import time
+from contextlib import contextmanager
+
+import bson
+
+
+class StageTimer:
+    """Collects wall-clock milliseconds per named ingestion stage."""
+
+    def __init__(self):
+        self.stage_ms = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_ms[name] = round((time.perf_counter() - t0) * 1000, 2)
+
+    @property
+    def total_ms(self):
+        return round((time.perf_counter() - self._start) * 1000, 2)
+
+
+def bson_size(docs):
+    """Bytes of BSON that inserting `docs` (SON/dicts) will write."""
+    return sum(len(bson.encode(d)) for d in docs)
+
+
+def record(resource_id, timer, outcome='completed', **stats):
+    """Persists one IngestionLog row. Never raises into the pipeline."""
+    try:
+        from rag.models import IngestionLog
+        IngestionLog(
+            resource_id=resource_id, outcome=outcome, stage_ms=timer.stage_ms,
+            total_ms=timer.total_ms, **stats
+        ).save()
+    except Exception as e:
+        print(f'[RAG] Could not record ingestion metrics for {resource_id}: {e}')
@@ -1,4 +1,7 @@
 import mongoengine as me
+from datetime import datetime
+
+from core.managers import LeanManager
 
 class ResourceChunk(me.Document):
     resource_id    = me.ObjectIdField(required=True)
@@ -12,7 +15,54 @@ class ResourceChunk(me.Document):
     page_number    = me.IntField()           # PDF only
     status         = me.StringField(choices=['pending', 'approved'], default='approved')
 
+    # Text-only reads skip `embedding`; the retriever goes through `vectors`
+    objects = LeanManager('embedding')
+    vectors = me.QuerySetManager()
+
     meta = {'collection': 'resource_chunks',
 
-            'indexes': ['resource_id', 'semester', 'subject_id']}
+            # Retriever shapes: status + semester (+ subject), status + subject list
+            'indexes': [
+                'resource_id',
+                ('status', 'semester', 'subject_id'),
+                ('status', 'subject_id'),
+            ]}
+
+
+
+class IngestionLog(me.Document):
+    """One row per pipeline run: per-stage timings and volume for a resource."""
+    resource_id   = me.ObjectIdField(required=True)
+    outcome       = me.StringField(choices=['completed', 'failed'], default='completed')
+    pages         = me.IntField(default=0)
+    tokens        = me.IntField(default=0)
+    chunks        = me.IntField(default=0)
+    bytes_written = me.IntField(default=0)
+    stage_ms      = me.DictField()           # {'extract': 12.3, 'chunk': ..., 'embed': ..., 'write': ...}
+    total_ms      = me.FloatField(default=0)
+    created_at    = me.DateTimeField(default=datetime.utcnow)
+
+    meta = {'collection': 'ingestion_logs',
+
+            'indexes': ['resource_id', '-created_at']}
+
+
+class JobItem(me.EmbeddedDocument):
+    resource_id = me.ObjectIdField(required=True)
+    title       = me.StringField()
+    status      = me.StringField(choices=['queued', 'processing', 'completed', 'failed'], default='queued')
+    chunks      = me.IntField(default=0)
+    error       = me.StringField()
+
+
+class IngestionJob(me.Document):
+    """A batch of resources indexed together (bulk upload), with per-file progress."""
+    user_id     = me.ObjectIdField(required=True)
+    status      = me.StringField(choices=['queued', 'running', 'completed', 'failed'], default='queued')
+    items       = me.EmbeddedDocumentListField(JobItem)
+    created_at  = me.DateTimeField(default=datetime.utcnow)
+    finished_at = me.DateTimeField()
+
+    meta = {'collection': 'ingestion_jobs',
 
+            'indexes': ['user_id', '-created_at']}
@@ -1,49 +1,286 @@
+import time
+from datetime import datetime
+
+import numpy as np
 from bson import ObjectId
-from repository.models import Resource, Subject
+from django.conf import settings
+from pymongo import DeleteMany, InsertOne
+from repository.models import Resource
+from repository.refcache import refs
+from repository import previews
 
-from rag.models import ResourceChunk
+from rag.models import IngestionJob, ResourceChunk
 from rag.extractor import extract
 from rag.chunker import chunk
 from rag.embedder import embed_many
+from rag import metrics
+from search import index as resource_index
+from search import neighbors
+
+
+def resource_text(resource, subject=None):
+    """Metadata string used for the resource-level (search) embedding."""
+    subject_str = f"{subject.code} {subject.name}" if subject else ""
+    return f"{resource.title} {resource.description} {subject_str} {' '.join(resource.tags or [])}"
+
+
+def resource_vector(meta_vec, chunk_vecs, weights):
+    """
+    Resource-level vector. With RAG_CONTENT_VECTOR_WEIGHT > 0 the metadata
+    embedding is blended with a length-weighted mean of the chunk embeddings.
+    """
+    alpha = getattr(settings, 'RAG_CONTENT_VECTOR_WEIGHT', 0.0)
+    if not alpha or not chunk_vecs:
+        return meta_vec
+
+    meta = np.asarray(meta_vec, dtype=np.float32)
+    content = np.average(np.asarray(chunk_vecs, dtype=np.float32), axis=0, weights=weights)
+    meta /= np.linalg.norm(meta) or 1.0
+    content /= np.linalg.norm(content) or 1.0
+    blended = (1 - alpha) * meta + alpha * content
+    return (blended / (np.linalg.norm(blended) or 1.0)).tolist()
+
+
+def indexed_copy(resource):
+    """Another live resource with the same file content whose chunks are ready, if any."""
+    if not resource.file_hash:
+        return None
+    return Resource.objects(
+        file_hash=resource.file_hash, indexing_status='completed',
+        status__ne='rejected', id__ne=resource.id,
+    ).only('id').first()
+
+
+def cloned_chunks(donor_id):
+    """Chunk dicts and embeddings copied from an already indexed resource."""
+    chunks, embeddings = [], []
+    for c in ResourceChunk.vectors(resource_id=donor_id).order_by('chunk_index'):
+        chunks.append({'index': c.chunk_index, 'text': c.chunk_text, 'page': c.page_number, 'tokens': 0})
+        embeddings.append(c.embedding)
+    return chunks, embeddings
+
+
+def chunk_status(resource_id):
+    """Status chunks of the resource should carry; None if it was rejected or deleted."""
+    status = Resource.objects(id=resource_id).scalar('status').first()
+    return status if status in ('pending', 'approved') else None
+
+
+class Ingestion:
+    """One resource's trip through the pipeline; process() and process_batch() share it."""
+
+    def __init__(self, resource):
+        self.r = resource
+        self.subject = None
+        self.timer = metrics.StageTimer()
+        self.stats = {}
+        self.pages = None
+        self.chunks = []
+        self.embeddings = None
+        self.meta_vec = None
+        self.donor = None
+
+    def prepare(self):
+        """Extract and chunk, or copy chunks + embeddings from an identical indexed file."""
+        r, timer = self.r, self.timer
+        self.subject = refs.subject(r.subject_id)
+        self.donor = indexed_copy(r)
+        if self.donor is not None:
+            with timer.stage('clone'):
+                self.chunks, self.embeddings = cloned_chunks(self.donor.id)
+            self.stats['chunks'] = len(self.chunks)
+            return
+        with timer.stage('extract'):
+            self.pages = extract(r)
+        with timer.stage('chunk'):
+            self.chunks = chunk(self.pages, str(r.id))
+        self.stats.update(pages=len(self.pages), chunks=len(self.chunks),
+                          tokens=sum(c['tokens'] for c in self.chunks))
 
-def process(resource_id: str, status: str = 'approved'):
-    """Extract → chunk → embed → save. Safe to re-run (deletes old chunks first)."""
+    def texts(self):
+        """Texts still to embed: the metadata text, then chunk texts unless copied."""
+        texts = [resource_text(self.r, self.subject)]
+        if self.embeddings is None:
+            texts += [c['text'] for c in self.chunks]
+        return texts
+
+    def take_vectors(self, vectors):
+        """Accepts the embeddings of texts(), in order."""
+        self.meta_vec = vectors[0]
+        if self.embeddings is None:
+            self.embeddings = vectors[1:]
+
+    def store(self):
+        """
+        Writes chunks and vectors. Chunk status follows the resource's status
+        at write time and is re-checked afterwards, so a review that lands
+        while this run is in flight is never overwritten by a stale status.
+        """
+        r, timer = self.r, self.timer
+        subject_code = self.subject.code if self.subject else ''
+        status = chunk_status(r.id) or 'pending'
+        with timer.stage('write'):
+            docs = [
+                ResourceChunk(
+                    resource_id=r.id, resource_title=r.title, subject_id=r.subject_id, subject_code=subject_code,
+                    semester=r.semester, chunk_index=c['index'], chunk_text=c['text'],
+                    embedding=emb, page_number=c['page'], status=status
+                ).to_mongo()
+                for c, emb in zip(self.chunks, self.embeddings)
+            ]
+            ops = [DeleteMany({'resource_id': r.id})]   # idempotent
+            ops += [InsertOne(d) for d in docs]
+            ResourceChunk._get_collection().bulk_write(ops, ordered=True)
+
+            # The chunks are in: a bad resource-level vector only costs recommendations
+            fields = {'set__indexing_status': 'completed'}
+            try:
+                fields['set__embedding'] = resource_vector(
+                    self.meta_vec, self.embeddings, [len(c['text']) for c in self.chunks])
+            except Exception as e:
+                print(f'[RAG] Resource vector failed for "{r.title}": {e}')
+            Resource.objects(id=r.id).update_one(**fields)
+
+            # Approve flips chunks after setting the status, reject deletes them:
+            # whichever landed during the write, one of the two sides catches it
+            now = chunk_status(r.id)
+            if now is None:
+                ResourceChunk.objects(resource_id=r.id).delete()
+            elif now != status:
+                ResourceChunk.objects(resource_id=r.id).update(set__status=now)
+        self.stats['bytes_written'] = metrics.bson_size(docs)
+        resource_index.sync(r.id)
+        neighbors.patch(r.id)
+
+        # Copies share the donor's previews (same file hash), so this is a no-op for them.
+        # A resource rejected meanwhile has had its file released: nothing to render.
+        if now is not None:
+            with timer.stage('preview'):
+                previews.generate(r, self.pages)
+
+        metrics.record(r.id, timer, **self.stats)
+        how = f'copied from {self.donor.id}' if self.donor is not None else 'indexed'
+        print(f'[RAG] {len(self.chunks)} chunks {how} — "{r.title}" ({now or "rejected"}) in {timer.total_ms:.0f} ms {timer.stage_ms}')
+
+    def fail(self, error):
+        print(f'[RAG] Error indexing "{self.r.title}": {error}')
+        Resource.objects(id=self.r.id).update_one(set__indexing_status='failed')
+        resource_index.sync(self.r.id)
+        metrics.record(self.r.id, self.timer, outcome='failed', **self.stats)
+
+
+def process(resource_id: str):
+    """
+    Extract → chunk → embed → save. Safe to re-run (deletes old chunks first).
+    Chunks take the resource's own status (see Ingestion.store).
+    The metadata text is embedded in the same batch as the chunks, so one run
+    produces both the resource-level and the chunk-level embeddings. If the
+    same file content is already indexed, its chunks and embeddings are
+    copied and only the metadata text is embedded.
+    """
     try:
         Resource.objects(id=ObjectId(resource_id)).update_one(set__indexing_status='processing')
         r = Resource.objects.get(id=ObjectId(resource_id))
     except Exception:
         return
+    resource_index.sync(r.id)   # bumps the stamp so cached listings show 'processing'
 
-    subject_code = ''
+    job = Ingestion(r)
     try:
-        subject_code = Subject.objects.get(id=r.subject_id).code
-    except Exception:
-        pass
+        job.prepare()
+        with job.timer.stage('embed'):
+            job.take_vectors(embed_many(job.texts()))
+        job.store()
+    except Exception as e:
+        job.fail(e)
 
-    try:
-        pages  = extract(r)
-        chunks = chunk(pages, resource_id)
-        if not chunks:
-            Resource.objects(id=r.id).update_one(set__indexing_status='completed')
-            return
 
-        embeddings = embed_many([c['text'] for c in chunks])
-
-        ResourceChunk.objects(resource_id=r.id).delete()   # idempotent
-        ResourceChunk.objects.insert([
-            ResourceChunk(
-                resource_id=r.id, resource_title=r.title, subject_id=r.subject_id, subject_code=subject_code,
-                semester=r.semester, chunk_index=c['index'], chunk_text=c['text'],
-                embedding=emb, page_number=c['page'], status=status
-            )
-            for c, emb in zip(chunks, embeddings)
-        ])
-        
-        Resource.objects(id=r.id).update_one(set__indexing_status='completed')
-        print(f'[RAG] Indexed {len(chunks)} chunks — "{r.title}" ({status})')
+def process_batch(job_id):
+    """
+    Indexes every resource of an IngestionJob. Files are prepared one by
+    one and their texts pooled, so the model sees full embedding batches
+    across file boundaries (RAG_BATCH_EMBED_TEXTS texts per call) instead of
+    one short call per file. Each item's status is updated as it finishes.
+    An unexpected error fails the remaining items instead of leaving the
+    job running.
+    """
+    job = IngestionJob.objects.get(id=ObjectId(job_id))
+    status = 'failed'
+    try:
+        _index_items(job)
+        status = 'completed'
     except Exception as e:
-        print(f'[RAG] Error indexing "{r.title}": {e}')
-        Resource.objects(id=r.id).update_one(set__indexing_status='failed')
+        print(f'[RAG] Ingestion job {job.id} failed: {e}')
+        unfinished = {'$in': ['queued', 'processing']}
+        IngestionJob._get_collection().update_one(
+            {'_id': job.id},
+            {'$set': {'items.$[i].status': 'failed', 'items.$[i].error': str(e)}},
+            array_filters=[{'i.status': unfinished}],
+        )
+        ids = [item.resource_id for item in job.items]
+        stuck = Resource.objects(id__in=ids, indexing_status='processing').distinct('id')
+        if stuck:
+            Resource.objects(id__in=stuck).update(set__indexing_status='failed')
+            resource_index.sync(*stuck)
+    finally:
+        IngestionJob.objects(id=job.id).update_one(set__status=status, set__finished_at=datetime.utcnow())
+
 
+def _index_items(job):
+    IngestionJob.objects(id=job.id).update_one(set__status='running')
+    ids = [item.resource_id for item in job.items]
+    Resource.objects(id__in=ids).update(set__indexing_status='processing')
+    resource_index.sync(*ids)
+    resources = {r.id: r for r in Resource.objects(id__in=ids)}
 
+    def mark(resource_id, **fields):
+        IngestionJob.objects(id=job.id, items__resource_id=resource_id).update_one(
+            **{f'set__items__S__{k}': v for k, v in fields.items()}
+        )
+
+    def flush(pending):
+        texts = [t for ingestion in pending for t in ingestion.texts()]
+        try:
+            start = time.perf_counter()
+            vectors = embed_many(texts)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+        except Exception as e:
+            for ingestion in pending:
+                ingestion.fail(e)
+                mark(ingestion.r.id, status='failed', error=str(e))
+            return
+        offset = 0
+        for ingestion in pending:
+            n = len(ingestion.texts())
+            ingestion.take_vectors(vectors[offset:offset + n])
+            # Shared call: charge each file its share of the embedding time
+            ingestion.timer.stage_ms['embed'] = round(elapsed_ms * n / len(texts), 2)
+            offset += n
+            try:
+                ingestion.store()
+                mark(ingestion.r.id, status='completed', chunks=len(ingestion.chunks))
+            except Exception as e:
+                ingestion.fail(e)
+                mark(ingestion.r.id, status='failed', error=str(e))
 
+    pending, queued_texts = [], 0
+    for resource_id in ids:
+        r = resources.get(resource_id)
+        if r is None:
+            mark(resource_id, status='failed', error='Resource was deleted.')
+            continue
+        mark(r.id, status='processing')
+        ingestion = Ingestion(r)
+        try:
+            ingestion.prepare()
+        except Exception as e:
+            ingestion.fail(e)
+            mark(r.id, status='failed', error=str(e))
+            continue
+        pending.append(ingestion)
+        queued_texts += len(ingestion.texts())
+        if queued_texts >= settings.RAG_BATCH_EMBED_TEXTS:
+            flush(pending)
+            pending, queued_texts = [], 0
+    if pending:
+        flush(pending)
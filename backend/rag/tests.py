@@ -1,3 +1,37 @@
-from django.test import TestCase
+import numpy as np
+from django.test import SimpleTestCase, override_settings
 
-# Create your tests here.
+from .pipeline import resource_vector
+
+
+class ResourceVectorTests(SimpleTestCase):
+    @override_settings(RAG_CONTENT_VECTOR_WEIGHT=0.0)
+    def test_metadata_only_by_default(self):
+        meta = [0.0, 3.0]
+        self.assertIs(resource_vector(meta, [[1.0, 0.0]], [1]), meta)
+
+    @override_settings(RAG_CONTENT_VECTOR_WEIGHT=0.5)
+    def test_no_chunks_keeps_metadata(self):
+        meta = [0.0, 3.0]
+        self.assertIs(resource_vector(meta, [], []), meta)
+
+    @override_settings(RAG_CONTENT_VECTOR_WEIGHT=0.5)
+    def test_blend_of_unit_vectors(self):
+        vec = resource_vector([2.0, 0.0], [[0.0, 5.0]], [1])
+        np.testing.assert_allclose(vec, [np.sqrt(0.5), np.sqrt(0.5)], rtol=1e-6)
+
+    @override_settings(RAG_CONTENT_VECTOR_WEIGHT=1.0)
+    def test_chunks_weighted_by_length(self):
+        vec = resource_vector([1.0, 0.0], [[1.0, 0.0], [0.0, 1.0]], [3, 1])
+        np.testing.assert_allclose(vec, np.array([3.0, 1.0]) / np.sqrt(10), rtol=1e-6)
+
+    @override_settings(RAG_CONTENT_VECTOR_WEIGHT=0.3)
+    def test_result_is_unit_length_list(self):
+        vec = resource_vector([0.2, 0.4, 0.1], [[1.0, 2.0, 3.0], [0.5, 0.0, 0.5]], [10, 40])
+        self.assertIsInstance(vec, list)
+        self.assertAlmostEqual(float(np.linalg.norm(vec)), 1.0, places=5)
+
+    @override_settings(RAG_CONTENT_VECTOR_WEIGHT=0.5)
+    def test_zero_vectors_do_not_divide_by_zero(self):
+        vec = resource_vector([0.0, 0.0], [[0.0, 0.0]], [1])
+        self.assertEqual(vec, [0.0, 0.0])
@@ -1,6 +1,7 @@
 from django.urls import path
-from .views import RAGAskView
+from .views import RAGAskView, IngestionJobView
 
 urlpatterns = [
     path('rag/ask/', RAGAskView.as_view()),
+    path('ingestion/jobs/<str:job_id>/', IngestionJobView.as_view()),
 ]
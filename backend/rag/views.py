@@ -6,6 +6,8 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rag.retriever import retrieve
 from rag.llm import build_messages, stream
+from rag.models import IngestionJob
+from bson import ObjectId
 
 class RAGAskView(APIView):
     permission_classes = [IsAuthenticated]
@@ -59,3 +61,36 @@ class RAGAskView(APIView):
         resp['Cache-Control']     = 'no-cache'
         resp['X-Accel-Buffering'] = 'no'
         return resp
+
+
+class IngestionJobView(APIView):
+    """GET: Per-file progress of a batched indexing job (owner or HOD)."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        try:
+            job = IngestionJob.objects.get(id=ObjectId(job_id))
+        except Exception:
+            return Response({'error': 'Job not found.'}, status=404)
+        if job.user_id != request.user.id and request.user.role != 'hod':
+            return Response({'error': 'Job not found.'}, status=404)
+
+        counts = {}
+        for item in job.items:
+            counts[item.status] = counts.get(item.status, 0) + 1
+        return Response({
+            'job_id': str(job.id),
+            'status': job.status,
+            'total': len(job.items),
+            'completed': counts.get('completed', 0),
+            'failed': counts.get('failed', 0),
+            'created_at': job.created_at.isoformat() + 'Z',
+            'finished_at': job.finished_at.isoformat() + 'Z' if job.finished_at else None,
+            'items': [{
+                'resource_id': str(item.resource_id),
+                'title': item.title,
+                'status': item.status,
+                'chunks': item.chunks,
+                'error': item.error,
+            } for item in job.items],
+        })
@@ -1,5 +1,16 @@
+import sys
+import threading
+
 from django.apps import AppConfig
 
 
 class RepositoryConfig(AppConfig):
     name = 'repository'
+
+    def ready(self):
+        # Warm the subject/user-name cache off the startup path; skip it for
+        # one-off management commands other than the dev server.
+        if 'manage.py' in sys.argv[0] and 'runserver' not in sys.argv:
+            return
+        from .refcache import refs
+        threading.Thread(target=refs.warm, daemon=True).start()
@@ -0,0 +1,81 @@
+"""
+Buffered download counters.
+
+Downloads add to an in-memory tally per resource. The tally is written as
+one unordered bulk of `$inc` updates when it reaches a threshold, every few
+seconds from a background thread, and once more at interpreter exit, so a
+burst of downloads on one file costs a handful of small updates instead of
+a document write per click.
+"""
+import atexit
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from pymongo import UpdateOne
+
+from core import versions
+from .models import Resource
+
+
+class DownloadCounter:
+    def __init__(self, interval, threshold):
+        self.interval = interval
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._thread = None
+
+    def increment(self, resource_id):
+        if self.interval <= 0:
+            # Buffering disabled: write through; a lost count must not fail the download
+            try:
+                self._write({resource_id: 1})
+            except Exception as e:
+                print(f"[Downloads] Write failed, dropping 1 increment: {e}")
+            return
+        with self._lock:
+            self._pending[resource_id] += 1
+            full = sum(self._pending.values()) >= self.threshold
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Writes every pending increment; returns the number of resources updated."""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        if not pending:
+            return 0
+        try:
+            self._write(pending)
+        except Exception as e:
+            print(f"[Downloads] Flush failed, keeping {sum(pending.values())} increments: {e}")
+            with self._lock:
+                self._pending.update(pending)
+            return 0
+        return len(pending)
+
+    def _write(self, counts):
+        """Applies `counts`; raises only if they were not written (safe to retry)."""
+        Resource._get_collection().bulk_write(
+            [UpdateOne({"_id": rid}, {"$inc": {"download_count": n}}) for rid, n in counts.items()],
+            ordered=False,
+        )
+        # The increments are in; a failed bump must not get them re-queued
+        try:
+            versions.bump("downloads")
+        except Exception as e:
+            print(f"[Downloads] Version bump failed: {e}")
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+
+downloads = DownloadCounter(settings.DOWNLOAD_FLUSH_SECONDS, settings.DOWNLOAD_FLUSH_THRESHOLD)
+atexit.register(downloads.flush)
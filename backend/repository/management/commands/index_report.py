@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from rag.models import ResourceChunk
+from repository.models import Resource
+from repository.query_shapes import SHAPES
+
+
+def plan_stages(plan):
+    """Every stage in a winning plan tree, root first."""
+    plan = plan.get('queryPlan', plan)   # slot-based engine nests the classic plan
+    stages = [plan]
+    for child in [plan.get('inputStage')] + plan.get('inputStages', []):
+        if child:
+            stages.extend(plan_stages(child))
+    return stages
+
+
+class Command(BaseCommand):
+    help = 'Explains every registered Resource/ResourceChunk query shape and flags collection scans and in-memory sorts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ensure', action='store_true',
+                            help='Create any missing model indexes before explaining.')
+
+    def handle(self, *args, **options):
+        if options['ensure']:
+            Resource.ensure_indexes()
+            ResourceChunk.ensure_indexes()
+            self.stdout.write(self.style.NOTICE('Ensured model indexes.'))
+
+        problems = 0
+        for shape in SHAPES:
+            cursor = shape.model._get_collection().find(shape.filter)
+            if shape.sort:
+                cursor = cursor.sort(shape.sort)
+            explained = cursor.limit(20).explain()
+            stages = plan_stages(explained['queryPlanner']['winningPlan'])
+            names = {s['stage'] for s in stages}
+            indexes = sorted({s['indexName'] for s in stages if s.get('indexName')})
+
+            flags = []
+            if 'COLLSCAN' in names:
+                flags.append('COLLSCAN')
+            if 'SORT' in names:
+                flags.append('in-memory SORT')
+
+            used = ', '.join(indexes) or '-'
+            line = f'{shape.model.__name__:<14} {shape.name:<22} {used}'
+            if flags:
+                problems += 1
+                self.stdout.write(self.style.WARNING(f'{line}  <- {", ".join(flags)}'))
+            else:
+                self.stdout.write(line)
+
+        style = self.style.WARNING if problems else self.style.SUCCESS
+        self.stdout.write(style(f'{problems} of {len(SHAPES)} query shapes need an index.'))
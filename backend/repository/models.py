@@ -1,6 +1,8 @@
 import mongoengine as me
 from datetime import datetime
 
+from core.managers import LeanManager
+
 
 class Subject(me.Document):
     code = me.StringField(required=True, unique=True)
@@ -22,6 +24,7 @@ class Resource(me.Document):
     file_path = me.StringField()
     file_format = me.StringField(choices=["pdf", "ppt", "doc", "image"])
     original_filename = me.StringField()
+    file_hash = me.StringField()   # SHA-256 of the content; see storage.py
 
     # URL fields
     url = me.StringField()
@@ -54,8 +57,55 @@ class Resource(me.Document):
 
     upload_date = me.DateTimeField(default=datetime.utcnow)
 
+    # Reads skip `embedding` unless they go through `vectors`
+    objects = LeanManager("embedding")
+    vectors = me.QuerySetManager()
 
     meta = {
         "collection": "resources",
-        "indexes": ["status", "semester", "subject_id", "uploaded_by", "upload_date"],
+        # One index per query shape in query_shapes.SHAPES; check with
+        # `manage.py index_report`. Listing indexes end in the keyset
+        # (upload_date, _id) and also serve the pending queue (walked forward).
+        "indexes": [
+            "subject_id",
+            "file_hash",
+            {"fields": ["status", "-upload_date", "-id"]},
+            {"fields": ["status", "semester", "-upload_date", "-id"]},
+            {"fields": ["status", "subject_id", "-upload_date", "-id"]},
+            {"fields": ["uploaded_by", "-upload_date", "-id"]},
+            {"fields": ["status", "-download_count"]},
+            {"fields": ["status", "file_format"]},
+            {"fields": ["status", "resource_type"]},
+            {"fields": ["reviewed_by", "status"]},
+        ],
+    }
+
+
+class UploadSession(me.Document):
+    """A resumable file upload in progress; see uploads.py."""
+    user_id = me.ObjectIdField(required=True)
+    metadata = me.DictField()          # title, semester, subject_id, ... as for a direct upload
+    filename = me.StringField(required=True)
+    file_format = me.StringField()
+    size = me.IntField(required=True)
+    part_size = me.IntField(required=True)
+    received = me.IntField(default=0)  # bytes received contiguously from offset 0
+    status = me.StringField(choices=["uploading", "finishing"], default="uploading")
+    writer = me.StringField()          # token of the request writing a part, see uploads.write_part
+    locked_until = me.DateTimeField()
+    created_at = me.DateTimeField(default=datetime.utcnow)
+    expires_at = me.DateTimeField(required=True)
+
+    meta = {
+        "collection": "upload_sessions",
+        "indexes": ["user_id", {"fields": ["expires_at"], "expireAfterSeconds": 0}],
     }
+
+
+class BlobRef(me.Document):
+    """Per-blob lock between uploads adopting a blob and releases deleting it; see storage.py."""
+    sha256 = me.StringField(primary_key=True)
+    holds = me.IntField(default=0)       # uploads that stored the blob but have not saved their resource
+    deleting_at = me.DateTimeField()     # set while a release is deleting the file
+
+    meta = {"collection": "blob_refs"}
@@ -0,0 +1,92 @@
+"""
+Keyset pagination for resource listings.
+
+Pages are ordered by (upload_date, _id) descending. The `next` cursor is an
+opaque token holding the last row's key, and the following page is read
+with a range condition on that key, so every page costs one index seek
+regardless of depth. Totals are counted once per filter set and cached
+until the "resources" version stamp moves.
+"""
+import base64
+import json
+from datetime import datetime
+
+from bson import ObjectId
+from django.conf import settings
+
+from core import versions
+from search.cache import ResultCache
+
+ORDER = ("-upload_date", "-id")
+
+_totals = ResultCache(maxsize=512, ttl=settings.LISTING_COUNT_TTL)
+
+
+def encode_cursor(resource):
+    key = [resource.upload_date.isoformat(), str(resource.id)]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """(upload_date, ObjectId) from a cursor; raises ValueError if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        date, oid = json.loads(raw)
+        return datetime.fromisoformat(date), ObjectId(oid)
+    except Exception:
+        raise ValueError("Invalid cursor.")
+
+
+def after(qs, cursor):
+    """Restricts a queryset to rows strictly after the cursor in ORDER."""
+    date, oid = decode_cursor(cursor)
+    return qs.filter(__raw__={"$or": [
+        {"upload_date": {"$lt": date}},
+        {"upload_date": date, "_id": {"$lt": oid}},
+    ]})
+
+
+def cached_total(qs, key):
+    """qs.count(), reused until any resource write bumps the stamp."""
+    (version,) = versions.current("resources", max_age=settings.SEARCH_VERSION_POLL_SECONDS)
+    key = (key, version)
+    total = _totals.get(key)
+    if total is None:
+        total = qs.count()
+        _totals.set(key, total)
+    return total
+
+
+def keyset_page(request, qs, count_key):
+    """
+    Response body for one page of `qs`. Query params: `cursor` (from a
+    previous `next`), `page_size`, and `total=0` to skip the count.
+    The legacy `page` param still selects an offset page. Raises
+    ValueError on a bad cursor or page.
+    """
+    params = request.query_params
+    try:
+        page_size = int(params.get("page_size", settings.LISTING_PAGE_SIZE))
+        page = max(int(params["page"]), 1) if "page" in params else None
+    except ValueError:
+        raise ValueError("Invalid page parameter.")
+    page_size = max(1, min(page_size, settings.LISTING_MAX_PAGE_SIZE))
+
+    data = {"page_size": page_size}
+    if params.get("total") not in ("0", "false"):
+        data["count"] = cached_total(qs, count_key)
+
+    qs = qs.order_by(*ORDER)
+    if page is not None:
+        data["page"] = page
+        rows = list(qs[(page - 1) * page_size : page * page_size + 1])
+    else:
+        if cursor := params.get("cursor"):
+            qs = after(qs, cursor)
+        rows = list(qs[: page_size + 1])
+
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+    data["next"] = encode_cursor(rows[-1]) if has_next else None
+    data["results"] = rows
+    return data
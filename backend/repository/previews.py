@@ -0,0 +1,142 @@
+"""
+Resource previews, cached on disk by file content.
+
+    pdf    first PREVIEW_PAGES pages rendered to PNG (PyMuPDF), plus a thumbnail
+    image  a thumbnail (Pillow)
+    ppt    a text snippet from the extracted slides
+    doc    a text snippet from the extracted paragraphs
+
+Files live under MEDIA_ROOT/previews/<ab>/<key>/, where the key is the
+resource's file_hash, so identical uploads share one set of previews and a
+cached preview never goes stale. Each render goes to a temp directory that
+is renamed into place when complete, so a directory that exists is whole.
+Generation runs in the ingestion pipeline; the preview endpoint falls back
+to generating on first request. storage.py discards previews with the blob.
+"""
+import json
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+
+from .utils import get_full_path
+
+THUMB_NAME = "thumb.jpg"
+SNIPPET_NAME = "snippet.json"
+
+
+def cache_key(resource):
+    # Files stored before content addressing have no hash
+    return resource.file_hash or f"resource-{resource.id}"
+
+
+def key_dir(key):
+    return os.path.join(settings.MEDIA_ROOT, "previews", key[:2], key)
+
+
+def preview_dir(resource):
+    return key_dir(cache_key(resource))
+
+
+def page_name(page):
+    return f"page-{page}.png"
+
+
+def _thumbnail(image, dest):
+    image = image.convert("RGB")
+    image.thumbnail((settings.PREVIEW_THUMB_SIZE, settings.PREVIEW_THUMB_SIZE))
+    image.save(dest, "JPEG", quality=80, optimize=True)
+
+
+def _render_pdf(source, directory):
+    import fitz
+    from PIL import Image
+
+    with fitz.open(source) as doc:
+        for i in range(min(settings.PREVIEW_PAGES, doc.page_count)):
+            pix = doc[i].get_pixmap(dpi=settings.PREVIEW_DPI)
+            pix.save(os.path.join(directory, page_name(i + 1)))
+            if i == 0:
+                image = Image.frombytes("RGB" if pix.n < 4 else "RGBA", (pix.width, pix.height), pix.samples)
+                _thumbnail(image, os.path.join(directory, THUMB_NAME))
+
+
+def _render_image(source, directory):
+    from PIL import Image
+
+    with Image.open(source) as image:
+        _thumbnail(image, os.path.join(directory, THUMB_NAME))
+
+
+def _write_snippet(pages, directory):
+    text = "\n\n".join(t.strip() for _, t in pages if t and t.strip())
+    limit = settings.PREVIEW_SNIPPET_CHARS
+    snippet = {"text": text[:limit], "truncated": len(text) > limit}
+    with open(os.path.join(directory, SNIPPET_NAME), "w") as f:
+        json.dump(snippet, f)
+
+
+def generate(resource, pages=None):
+    """
+    Renders previews for a file resource unless they already exist.
+    `pages` is the extractor's [(page, text)] output, reused for text
+    snippets when the caller already has it. Returns True if previews exist.
+    """
+    if resource.resource_type != "file" or not resource.file_path:
+        return False
+    directory = preview_dir(resource)
+    if os.path.isdir(directory):
+        return True
+
+    source = get_full_path(resource.file_path)
+    if not os.path.exists(source):
+        return False
+
+    os.makedirs(os.path.dirname(directory), exist_ok=True)
+    work = tempfile.mkdtemp(prefix=".render-", dir=os.path.dirname(directory))
+    try:
+        if resource.file_format == "pdf":
+            _render_pdf(source, work)
+        elif resource.file_format == "image":
+            _render_image(source, work)
+        else:
+            if pages is None:
+                from rag.extractor import extract
+                pages = extract(resource)
+            _write_snippet(pages, work)
+    except Exception as e:
+        print(f"[Preview] {resource.id}: {e}")
+        shutil.rmtree(work, ignore_errors=True)
+        return False
+    try:
+        os.rename(work, directory)
+    except OSError:
+        # A concurrent render finished first; its directory is just as good
+        shutil.rmtree(work, ignore_errors=True)
+    return os.path.isdir(directory)
+
+
+def discard(key):
+    """Deletes the previews cached under `key` (see cache_key)."""
+    shutil.rmtree(key_dir(key), ignore_errors=True)
+
+
+def find(resource, kind, page=1):
+    """Path of a cached preview file (kind: 'page', 'thumb' or 'text'), or None."""
+    name = {"page": page_name(page), "thumb": THUMB_NAME, "text": SNIPPET_NAME}.get(kind)
+    if name is None:
+        return None
+    path = os.path.join(preview_dir(resource), name)
+    return path if os.path.exists(path) else None
+
+
+def available(resource):
+    """What previews a resource has, for the API."""
+    directory = preview_dir(resource)
+    names = os.listdir(directory) if os.path.isdir(directory) else []
+    return {
+        "pages": sorted(int(n[5:-4]) for n in names if n.startswith("page-")),
+        "thumb": THUMB_NAME in names,
+        "text": SNIPPET_NAME in names,
+    }
@@ -0,0 +1,55 @@
+"""
+Registry of the hot Resource / ResourceChunk query shapes.
+
+Each entry mirrors a filter + sort issued by a view, with placeholder
+values. `manage.py index_report` explains every shape against the live
+collections, so an index that a new query needs (or one a model change
+dropped) shows up as a COLLSCAN or in-memory SORT. Add an entry here when
+adding a query to a view.
+"""
+from collections import namedtuple
+
+from bson import ObjectId
+
+from rag.models import ResourceChunk
+from .models import Resource
+
+QueryShape = namedtuple("QueryShape", "name model filter sort")
+
+_SUBJECTS = [ObjectId(), ObjectId()]
+_USER = ObjectId()
+
+SHAPES = [
+    # repository.views.ResourceListView (keyset pages, one per role scope)
+    QueryShape("list: hod", Resource, {"status": "approved"}, [("upload_date", -1), ("_id", -1)]),
+    QueryShape("list: student", Resource, {"status": "approved", "semester": 4},
+               [("upload_date", -1), ("_id", -1)]),
+    QueryShape("list: faculty", Resource, {"status": "approved", "subject_id": {"$in": _SUBJECTS}},
+               [("upload_date", -1), ("_id", -1)]),
+    QueryShape("list: subject filter", Resource, {"status": "approved", "subject_id": _SUBJECTS[0]},
+               [("upload_date", -1), ("_id", -1)]),
+    # repository.views.ResourceMySubmissionsView
+    QueryShape("my submissions", Resource, {"uploaded_by": _USER}, [("upload_date", -1), ("_id", -1)]),
+    # repository.views.ResourcePendingView
+    QueryShape("pending: hod", Resource, {"status": "pending"}, [("upload_date", 1)]),
+    QueryShape("pending: faculty", Resource, {"status": "pending", "subject_id": {"$in": _SUBJECTS}},
+               [("upload_date", 1)]),
+    # repository.views.SubjectDetailView.delete
+    QueryShape("subject in use", Resource, {"subject_id": _SUBJECTS[0]}, None),
+    # analytics.views
+    QueryShape("top resources", Resource, {"status": "approved"}, [("download_count", -1)]),
+    QueryShape("uploads by format", Resource, {"status": "approved", "file_format": "pdf"}, None),
+    QueryShape("url resources", Resource, {"status": "approved", "resource_type": "url"}, None),
+    QueryShape("faculty approvals", Resource, {"reviewed_by": _USER, "status": "approved"}, None),
+    # rag.retriever.retrieve
+    QueryShape("chunks: student", ResourceChunk,
+               {"status": "approved", "semester": 4, "embedding": {"$exists": True}}, None),
+    QueryShape("chunks: subject", ResourceChunk,
+               {"status": "approved", "semester": 4, "subject_id": _SUBJECTS[0],
+                "embedding": {"$exists": True}}, None),
+    QueryShape("chunks: faculty", ResourceChunk,
+               {"status": "approved", "subject_id": {"$in": _SUBJECTS},
+                "embedding": {"$exists": True}}, None),
+    # rag.pipeline / approval and deletion
+    QueryShape("chunks of resource", ResourceChunk, {"resource_id": ObjectId()}, None),
+]
@@ -0,0 +1,91 @@
+"""
+Process-local cache of reference data: subjects and user display names.
+
+Both change rarely but are looked up on nearly every request. Entries are
+dropped whenever the "subjects" / "users" version stamps (core/versions.py)
+move, so writes in any worker invalidate every worker's copy.
+"""
+import threading
+from collections import namedtuple
+
+from django.conf import settings
+
+from accounts.models import User
+from core import versions
+from .models import Subject
+
+SubjectRef = namedtuple("SubjectRef", "id code name semester faculty_id")
+
+MAX_USERS = 50000
+
+
+class ReferenceCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subjects = None
+        self._subjects_version = -1
+        self._users = {}
+        self._users_version = -1
+
+    def _refresh(self):
+        subjects_v, users_v = versions.current(
+            "subjects", "users", max_age=settings.REFCACHE_POLL_SECONDS
+        )
+        with self._lock:
+            if subjects_v != self._subjects_version:
+                self._subjects, self._subjects_version = None, subjects_v
+            if users_v != self._users_version:
+                self._users, self._users_version = {}, users_v
+
+    def subjects(self):
+        """{subject id: SubjectRef} for every subject."""
+        self._refresh()
+        subjects = self._subjects
+        if subjects is None:
+            subjects = {
+                s.id: SubjectRef(s.id, s.code, s.name, s.semester, s.faculty_id)
+                for s in Subject.objects.only("code", "name", "semester", "faculty_id")
+            }
+            with self._lock:
+                self._subjects = subjects
+        return subjects
+
+    def subject(self, subject_id):
+        return self.subjects().get(subject_id)
+
+    def user_names(self, user_ids):
+        """{user id: name} for the given ids; only unseen ids hit Mongo."""
+        self._refresh()
+        ids = {uid for uid in user_ids if uid}
+        with self._lock:
+            missing = [uid for uid in ids if uid not in self._users]
+        if missing:
+            found = {u.id: u.name for u in User.objects(id__in=missing).only("name")}
+            with self._lock:
+                if len(self._users) > MAX_USERS:
+                    self._users = {}
+                for uid in missing:
+                    self._users[uid] = found.get(uid)
+        with self._lock:
+            return {uid: self._users.get(uid) for uid in ids}
+
+    def warm(self):
+        """Loads all subjects and faculty names up front."""
+        try:
+            self.subjects()
+            self.user_names(u.id for u in User.objects(role__in=["faculty", "hod"]).only("id"))
+        except Exception as e:
+            print(f"[RefCache] Warm-up failed: {e}")
+
+
+refs = ReferenceCache()
+
+
+def invalidate_subjects():
+    """Call after any subject write."""
+    versions.bump("subjects")
+
+
+def invalidate_users():
+    """Call after any user write."""
+    versions.bump("users")
@@ -0,0 +1,135 @@
+"""
+File responses for resource downloads.
+
+Django checks access; the bytes are then sent either by Django itself,
+honouring single `Range` / `If-Range` requests with 206 partial responses,
+or by the front proxy when DOWNLOAD_OFFLOAD is set:
+
+    "x-accel"     nginx: X-Accel-Redirect to DOWNLOAD_ACCEL_PREFIX + path
+    "x-sendfile"  Apache mod_xsendfile / lighttpd: X-Sendfile with the full path
+
+See deploy/nginx.conf for a matching nginx setup.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.http import http_date
+
+BLOCK_SIZE = 64 * 1024
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """
+    (start, end) inclusive for a single-range `Range` header, or None to
+    send the whole file (no header, malformed, or multiple ranges).
+    Raises RangeNotSatisfiable if the range lies outside the file.
+    """
+    match = _RANGE.match((header or "").strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if size == 0:
+        raise RangeNotSatisfiable()   # no byte of an empty file can be addressed
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+def _stream(path, start, length):
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            block = f.read(min(BLOCK_SIZE, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+
+
+def _offloaded(relative_path, full_path):
+    mode = getattr(settings, "DOWNLOAD_OFFLOAD", None)
+    if mode == "x-accel":
+        response = HttpResponse()
+        response["X-Accel-Redirect"] = settings.DOWNLOAD_ACCEL_PREFIX + quote(relative_path)
+    elif mode == "x-sendfile":
+        response = HttpResponse()
+        response["X-Sendfile"] = full_path
+    else:
+        return None
+    # Let the proxy set the real type/length from the file
+    del response["Content-Type"]
+    return response
+
+
+def _requested_start(request, size):
+    try:
+        byte_range = parse_range(request.headers.get("Range"), size)
+    except RangeNotSatisfiable:
+        return None
+    return byte_range[0] if byte_range else 0
+
+
+def file_response(request, relative_path, full_path, filename):
+    """
+    (response, counts) sending `full_path` as an attachment named
+    `filename`. `counts` is False for requests that do not start at byte 0
+    (resumed downloads, PDF viewers fetching pages), so those are not
+    counted as new downloads.
+    """
+    stat = os.stat(full_path)
+    size = stat.st_size
+
+    response = _offloaded(relative_path, full_path)
+    if response is not None:
+        counts = _requested_start(request, size) == 0
+    else:
+        etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+        last_modified = http_date(stat.st_mtime)
+
+        byte_range = None
+        if_range = request.headers.get("If-Range")
+        if if_range is None or if_range in (etag, last_modified):
+            try:
+                byte_range = parse_range(request.headers.get("Range"), size)
+            except RangeNotSatisfiable:
+                response = HttpResponse(status=416)
+                response["Content-Range"] = f"bytes */{size}"
+                return response, False
+
+        content_type, _ = mimetypes.guess_type(full_path)
+        start, end = byte_range or (0, size - 1)
+        length = max(end - start + 1, 0)
+        response = StreamingHttpResponse(
+            _stream(full_path, start, length),
+            status=206 if byte_range else 200,
+            content_type=content_type or "application/octet-stream",
+        )
+        response["Content-Length"] = str(length)
+        if byte_range:
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Accept-Ranges"] = "bytes"
+        response["ETag"] = etag
+        response["Last-Modified"] = last_modified
+        counts = start == 0
+
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response, counts
@@ -0,0 +1,173 @@
+"""
+Content-addressed file storage.
+
+Uploads are streamed to a temp file while their SHA-256 is computed, then
+moved to `blobs/<ab>/<cd>/<sha256>.<ext>` under MEDIA_ROOT. Identical files
+share one blob (and, via rag.pipeline, one set of extracted chunks). A blob
+is deleted only when no live resource references its hash any more.
+Files uploaded before this scheme keep their `uploads/...` paths.
+
+Committing a blob and releasing it are serialized per hash through a
+BlobRef document: commit_blob() takes a hold that the caller drops with
+adopted() once its resource is saved (or abandon() if saving failed), and a
+release may only delete the file while nobody holds it, marking it as being
+deleted so no upload can adopt it meanwhile.
+"""
+import hashlib
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from pymongo.errors import DuplicateKeyError
+
+from . import previews
+from .models import BlobRef, Resource
+from .utils import get_full_path, delete_file_if_exists
+
+
+def blob_path(sha256, ext):
+    """Path relative to MEDIA_ROOT for a blob."""
+    return os.path.join("blobs", sha256[:2], sha256[2:4], f"{sha256}.{ext}")
+
+
+def staging_dir():
+    path = os.path.join(settings.MEDIA_ROOT, "tmp")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+# A deletion older than this is assumed to have crashed and is taken over
+STALE_DELETE = timedelta(seconds=60)
+
+
+def _hold(sha256):
+    """Pins the blob against release; waits while a release is deleting it."""
+    coll = BlobRef._get_collection()
+    for _ in range(100):
+        free = [{"deleting_at": None}, {"deleting_at": {"$lt": datetime.utcnow() - STALE_DELETE}}]
+        try:
+            coll.update_one(
+                {"_id": sha256, "$or": free},
+                {"$inc": {"holds": 1}, "$unset": {"deleting_at": ""}},
+                upsert=True,
+            )
+            return
+        except DuplicateKeyError:   # being deleted right now
+            time.sleep(0.05)
+    raise RuntimeError(f"Blob {sha256} is locked for deletion.")
+
+
+def _unhold(sha256):
+    coll = BlobRef._get_collection()
+    coll.update_one({"_id": sha256}, {"$inc": {"holds": -1}})
+    coll.delete_one({"_id": sha256, "holds": {"$lte": 0}, "deleting_at": None})
+
+
+def commit_blob(temp_path, sha256, ext):
+    """
+    Moves a fully written temp file into the blob store; returns its
+    relative path. The blob is held until adopted() or abandon().
+    """
+    _hold(sha256)
+    relative_path = blob_path(sha256, ext)
+    full_path = get_full_path(relative_path)
+    try:
+        if os.path.exists(full_path):
+            os.remove(temp_path)   # already stored
+        else:
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            os.replace(temp_path, full_path)
+    except Exception:
+        _unhold(sha256)
+        raise
+    return relative_path
+
+
+def store_upload(file):
+    """
+    Streams an UploadedFile into the blob store; returns (relative path,
+    sha256), held as for commit_blob().
+    """
+    ext = file.name.rsplit(".", 1)[-1].lower()
+    digest = hashlib.sha256()
+    fd, temp_path = tempfile.mkstemp(dir=staging_dir())
+    try:
+        with os.fdopen(fd, "wb") as dest:
+            for chunk in file.chunks():
+                digest.update(chunk)
+                dest.write(chunk)
+        sha256 = digest.hexdigest()
+        return commit_blob(temp_path, sha256, ext), sha256
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def adopted(blobs):
+    """Call with the (path, sha256) pairs just stored once their resources are saved."""
+    for _, sha256 in blobs:
+        _unhold(sha256)
+
+
+def abandon(blobs):
+    """Call instead of adopted() when saving failed: deletes blobs nothing references."""
+    for path, sha256 in blobs:
+        _unhold(sha256)
+        _reclaim(sha256, {path}, [])
+
+
+def _reclaim(sha256, paths, released_ids):
+    """
+    Deletes `paths` and the blob's previews unless a live resource outside
+    `released_ids` or an upload still uses the blob.
+    """
+    coll = BlobRef._get_collection()
+    started = datetime.utcnow()
+    try:
+        coll.update_one(
+            {"_id": sha256, "holds": {"$not": {"$gt": 0}}, "deleting_at": None},
+            {"$set": {"deleting_at": started}},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        return   # held by an upload (or another release is deleting it)
+    try:
+        # No upload can adopt the blob now, so this check cannot go stale
+        if not Resource.objects(file_hash=sha256, status__ne="rejected", id__nin=released_ids).count():
+            for path in paths:
+                delete_file_if_exists(path)
+            previews.discard(sha256)
+    finally:
+        coll.delete_one({"_id": sha256, "deleting_at": started})
+
+
+def release(resource):
+    """
+    Call once `resource` no longer needs its file (deleted or rejected).
+    Removes the blob unless another live resource shares it.
+    """
+    release_many([resource])
+
+
+def release_many(resources):
+    """release() for many resources, with one query for shared blobs."""
+    resources = [r for r in resources if r.file_path]
+    ids = [r.id for r in resources]
+    paths = {}   # sha256 -> paths
+    for r in resources:
+        if r.file_hash:
+            paths.setdefault(r.file_hash, set()).add(r.file_path)
+        else:
+            # Stored before content addressing: never shared
+            delete_file_if_exists(r.file_path)
+            previews.discard(previews.cache_key(r))
+    if not paths:
+        return
+    shared = set(
+        Resource.objects(file_hash__in=list(paths), status__ne="rejected", id__nin=ids).distinct("file_hash")
+    )
+    for sha256 in paths.keys() - shared:
+        _reclaim(sha256, paths[sha256], ids)
@@ -1,3 +1,183 @@
-from django.test import TestCase
+from datetime import datetime
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from bson import ObjectId
+from django.test import SimpleTestCase
+from pymongo.errors import DuplicateKeyError
+
+from . import pagination, storage
+from .serving import RangeNotSatisfiable, parse_range
+
+
+class ParseRangeTests(SimpleTestCase):
+    def test_no_header_sends_whole_file(self):
+        self.assertIsNone(parse_range(None, 1000))
+        self.assertIsNone(parse_range("", 1000))
+
+    def test_malformed_or_multiple_ranges_send_whole_file(self):
+        self.assertIsNone(parse_range("bytes=abc", 1000))
+        self.assertIsNone(parse_range("items=0-10", 1000))
+        self.assertIsNone(parse_range("bytes=0-1,5-6", 1000))
+        self.assertIsNone(parse_range("bytes=-", 1000))
+
+    def test_closed_range(self):
+        self.assertEqual(parse_range("bytes=0-99", 1000), (0, 99))
+        self.assertEqual(parse_range(" bytes=500-500 ", 1000), (500, 500))
+
+    def test_open_range_runs_to_end(self):
+        self.assertEqual(parse_range("bytes=900-", 1000), (900, 999))
+
+    def test_end_past_file_is_clamped(self):
+        self.assertEqual(parse_range("bytes=900-5000", 1000), (900, 999))
+
+    def test_suffix_range(self):
+        self.assertEqual(parse_range("bytes=-100", 1000), (900, 999))
+        self.assertEqual(parse_range("bytes=-5000", 1000), (0, 999))
+
+    def test_unsatisfiable(self):
+        for header in ("bytes=1000-", "bytes=1000-2000", "bytes=50-10", "bytes=-0"):
+            with self.subTest(header=header), self.assertRaises(RangeNotSatisfiable):
+                parse_range(header, 1000)
+
+    def test_empty_file(self):
+        for header in ("bytes=0-", "bytes=0-0", "bytes=-5"):
+            with self.subTest(header=header), self.assertRaises(RangeNotSatisfiable):
+                parse_range(header, 0)
+
+
+def stored(file_hash, path=None):
+    return SimpleNamespace(
+        id=ObjectId(), file_hash=file_hash,
+        file_path=path or (storage.blob_path(file_hash, "pdf") if file_hash else "uploads/old.pdf"),
+    )
+
+
+@mock.patch.object(storage, "previews")
+@mock.patch.object(storage, "delete_file_if_exists")
+@mock.patch.object(storage, "BlobRef")
+@mock.patch.object(storage, "Resource")
+class ReleaseManyTests(SimpleTestCase):
+    """Resource queries and the blob_refs collection are mocked; no database needed."""
+
+    def setUp(self):
+        self.hash = "ab" * 32
+
+    def sharers(self, Resource, distinct=(), count=0):
+        Resource.objects.return_value.distinct.return_value = list(distinct)
+        Resource.objects.return_value.count.return_value = count
+
+    def test_unshared_blob_is_deleted_once(self, Resource, BlobRef, delete, previews):
+        self.sharers(Resource)
+        a, b = stored(self.hash), stored(self.hash)
+        storage.release_many([a, b])
+        delete.assert_called_once_with(a.file_path)
+        previews.discard.assert_called_once_with(self.hash)
+        # The deletion mark is always cleared
+        BlobRef._get_collection.return_value.delete_one.assert_called_once()
+
+    def test_blob_shared_with_live_resource_is_kept(self, Resource, BlobRef, delete, previews):
+        self.sharers(Resource, distinct=[self.hash])
+        storage.release_many([stored(self.hash)])
+        delete.assert_not_called()
+        BlobRef._get_collection.return_value.update_one.assert_not_called()
+
+    def test_blob_held_by_upload_is_kept(self, Resource, BlobRef, delete, previews):
+        self.sharers(Resource)
+        BlobRef._get_collection.return_value.update_one.side_effect = DuplicateKeyError("held")
+        storage.release_many([stored(self.hash)])
+        delete.assert_not_called()
+        previews.discard.assert_not_called()
+
+    def test_sharer_saved_before_lock_is_seen_by_recheck(self, Resource, BlobRef, delete, previews):
+        self.sharers(Resource, count=1)
+        storage.release_many([stored(self.hash)])
+        delete.assert_not_called()
+        BlobRef._get_collection.return_value.delete_one.assert_called_once()
+
+    def test_legacy_file_without_hash_is_deleted(self, Resource, BlobRef, delete, previews):
+        legacy = stored(None)
+        storage.release_many([legacy])
+        delete.assert_called_once_with(legacy.file_path)
+        Resource.objects.assert_not_called()
+
+    def test_url_resources_are_ignored(self, Resource, BlobRef, delete, previews):
+        storage.release_many([SimpleNamespace(id=ObjectId(), file_hash=None, file_path=None)])
+        delete.assert_not_called()
+        Resource.objects.assert_not_called()
+
+
+class FakeQuerySet:
+    """Just enough of a mongoengine QuerySet for keyset_page()."""
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+
+    def order_by(self, *keys):
+        assert keys == pagination.ORDER
+        return FakeQuerySet(sorted(self.rows, key=lambda r: (r.upload_date, r.id), reverse=True))
+
+    def filter(self, __raw__):
+        older, tie = __raw__["$or"]
+        date, oid = older["upload_date"]["$lt"], tie["_id"]["$lt"]
+        return FakeQuerySet(r for r in self.rows if r.upload_date < date or (r.upload_date == date and r.id < oid))
+
+    def __getitem__(self, key):
+        return self.rows[key]
+
+    def count(self):
+        return len(self.rows)
+
+
+def listing(**params):
+    return SimpleNamespace(query_params=params)
+
+
+class KeysetPageTests(SimpleTestCase):
+    def setUp(self):
+        # Three rows share each upload date, so pages split inside a tie
+        dates = [datetime(2024, 1, day) for day in (1, 1, 1, 2, 2, 2, 3)]
+        self.rows = [SimpleNamespace(id=ObjectId(), upload_date=d) for d in dates]
+        self.ordered = sorted(self.rows, key=lambda r: (r.upload_date, r.id), reverse=True)
+        self.qs = FakeQuerySet(self.rows)
+
+    def test_cursor_round_trip_with_tied_dates(self):
+        seen, cursor = [], None
+        while True:
+            params = {"page_size": "2", "total": "0"}
+            if cursor:
+                params["cursor"] = cursor
+            data = pagination.keyset_page(listing(**params), self.qs, "key")
+            self.assertNotIn("count", data)
+            seen += data["results"]
+            cursor = data["next"]
+            if cursor is None:
+                break
+        self.assertEqual(seen, self.ordered)
+
+    def test_cursor_encodes_last_row_key(self):
+        row = self.rows[0]
+        self.assertEqual(pagination.decode_cursor(pagination.encode_cursor(row)), (row.upload_date, row.id))
+
+    def test_malformed_cursor(self):
+        for cursor in ("!!!", "bm90IGpzb24", pagination.encode_cursor(self.rows[0])[:-4]):
+            with self.subTest(cursor=cursor), self.assertRaises(ValueError):
+                pagination.decode_cursor(cursor)
+        with self.assertRaises(ValueError):
+            pagination.keyset_page(listing(cursor="!!!", total="0"), self.qs, "key")
+
+    @mock.patch.object(pagination, "cached_total", return_value=7)
+    def test_legacy_page_param(self, cached_total):
+        data = pagination.keyset_page(listing(page="2", page_size="3"), self.qs, "key")
+        self.assertEqual(data["page"], 2)
+        self.assertEqual(data["count"], 7)
+        self.assertEqual(data["results"], self.ordered[3:6])
+        self.assertEqual(pagination.decode_cursor(data["next"])[1], self.ordered[5].id)
+
+        last = pagination.keyset_page(listing(page="3", page_size="3"), self.qs, "key")
+        self.assertEqual(last["results"], self.ordered[6:])
+        self.assertIsNone(last["next"])
+
+    def test_invalid_page_param(self):
+        with self.assertRaises(ValueError):
+            pagination.keyset_page(listing(page="two", total="0"), self.qs, "key")
@@ -0,0 +1,179 @@
+"""
+Resumable uploads.
+
+A client creates an UploadSession with the file's metadata and size, then
+PUTs numbered parts (part N starts at byte N * part_size) in order. Each part
+is appended to a staging file and fed to a SHA-256 kept in memory, so
+completing the upload only finalizes the digest and moves the file into the
+blob store (storage.py). A request locks the session in Mongo before it
+touches the staging file, and completing claims it, so concurrent or
+repeated requests cannot interleave. If a part lands on a worker that does not hold the
+running hash (restart, other gunicorn worker), the staged prefix is re-read
+once to rebuild it. Running hashes idle longer than a session lives are
+dropped, so abandoned uploads do not pin memory in the workers.
+"""
+import hashlib
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from django.conf import settings
+
+from . import storage
+from .models import UploadSession
+
+BLOCK_SIZE = 64 * 1024
+
+_lock = threading.Lock()
+_hashers = {}   # session id -> (bytes hashed, sha256 object, last used)
+
+
+class PartRejected(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def staging_path(session):
+    return os.path.join(storage.staging_dir(), f"upload-{session.id}.part")
+
+
+def part_bounds(session, part):
+    """(offset, length) of part number `part`."""
+    offset = part * session.part_size
+    if part < 0 or offset >= session.size:
+        raise PartRejected("Part number out of range.")
+    return offset, min(session.part_size, session.size - offset)
+
+
+def _evict_idle():
+    """Drops running hashes of sessions untouched for a session lifetime. Call with _lock held."""
+    cutoff = time.monotonic() - settings.UPLOAD_SESSION_TTL
+    for session_id in [k for k, entry in _hashers.items() if entry[2] < cutoff]:
+        del _hashers[session_id]
+
+
+def _hasher(session):
+    """Running hash of the first `session.received` bytes."""
+    with _lock:
+        entry = _hashers.pop(str(session.id), None)
+    if entry is not None and entry[0] == session.received:
+        return entry[1]
+
+    digest = hashlib.sha256()
+    remaining = session.received
+    if remaining:
+        with open(staging_path(session), "rb") as f:
+            while remaining > 0:
+                block = f.read(min(BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                digest.update(block)
+                remaining -= len(block)
+    return digest
+
+
+def write_part(session, part, stream, content_length):
+    """
+    Appends part `part` read from `stream`. Re-sending a part that was
+    already received is a no-op; skipping ahead is rejected with 409.
+    Returns the number of bytes received so far.
+    """
+    offset, length = part_bounds(session, part)
+    if offset + length <= session.received:
+        return session.received
+    if offset != session.received:
+        raise PartRejected("Parts must be sent in order.", status=409)
+    if content_length != length:
+        raise PartRejected(f"Part {part} must be exactly {length} bytes.")
+
+    # Lock the session at this offset before touching the staging file
+    token = uuid.uuid4().hex
+    now = datetime.utcnow()
+    coll = UploadSession._get_collection()
+    claimed = coll.update_one(
+        {"_id": session.id, "received": offset, "status": {"$ne": "finishing"},
+         "$or": [{"locked_until": None}, {"locked_until": {"$lt": now}}]},
+        {"$set": {"writer": token,
+                  "locked_until": now + timedelta(seconds=settings.UPLOAD_PART_LOCK_SECONDS)}},
+    )
+    if not claimed.modified_count:
+        raise PartRejected("Part is being written by another request; query the session and retry.", status=409)
+
+    try:
+        digest = _hasher(session)
+        path = staging_path(session)
+        with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+            f.seek(offset)
+            f.truncate()   # drop whatever a failed earlier attempt left behind
+            remaining = length
+            while remaining > 0:
+                block = stream.read(min(BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                f.write(block)
+                digest.update(block)
+                remaining -= len(block)
+        if remaining:
+            raise PartRejected("Connection closed before the part was complete.")
+
+        # Fails only if our lock lapsed and another request took over
+        advanced = coll.update_one(
+            {"_id": session.id, "writer": token, "received": offset},
+            {"$set": {"received": offset + length}, "$unset": {"writer": "", "locked_until": ""}},
+        )
+        if not advanced.modified_count:
+            raise PartRejected("Part was written concurrently; query the session and retry.", status=409)
+    except Exception:
+        coll.update_one({"_id": session.id, "writer": token}, {"$unset": {"writer": "", "locked_until": ""}})
+        raise
+
+    session.received = offset + length
+    with _lock:
+        _evict_idle()
+        _hashers[str(session.id)] = (session.received, digest, time.monotonic())
+    return session.received
+
+
+def claim(session):
+    """Marks a complete session as being finished; False if another request got there first."""
+    return bool(UploadSession._get_collection().update_one(
+        {"_id": session.id, "status": {"$ne": "finishing"}, "writer": None},
+        {"$set": {"status": "finishing"}},
+    ).modified_count)
+
+
+def unclaim(session):
+    UploadSession._get_collection().update_one({"_id": session.id}, {"$set": {"status": "uploading"}})
+
+
+def finish(session):
+    """Moves the complete staging file into the blob store; returns (relative path, sha256)."""
+    sha256 = _hasher(session).hexdigest()
+    ext = session.filename.rsplit(".", 1)[-1].lower()
+    return storage.commit_blob(staging_path(session), sha256, ext), sha256
+
+
+def discard(session):
+    with _lock:
+        _hashers.pop(str(session.id), None)
+    path = staging_path(session)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def remove_stale_parts():
+    """Deletes staging files and running hashes of sessions that expired without completing."""
+    with _lock:
+        _evict_idle()
+    cutoff = time.time() - settings.UPLOAD_SESSION_TTL
+    directory = storage.staging_dir()
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.startswith("upload-") and os.path.getmtime(path) < cutoff:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -4,13 +4,21 @@ from .views import (
     SubjectDetailView,
     SemesterListView,
     ResourceUploadView,
+    BulkUploadView,
     ResourceListView,
     ResourceDetailView,
     ResourceDownloadView,
+    ResourcePreviewView,
     ResourcePendingView,
     ResourceApproveView,
     ResourceRejectView,
     ResourceMySubmissionsView,
+    BulkApproveView,
+    BulkRejectView,
+    UploadSessionCreateView,
+    UploadSessionDetailView,
+    UploadPartView,
+    UploadCompleteView,
 )
 
 urlpatterns = [
@@ -22,8 +30,16 @@ urlpatterns = [
     path("resources/pending/", ResourcePendingView.as_view()),
     path("resources/my-submissions/", ResourceMySubmissionsView.as_view()),
     path("resources/upload/", ResourceUploadView.as_view()),
+    path("resources/bulk-upload/", BulkUploadView.as_view()),
+    path("resources/bulk-approve/", BulkApproveView.as_view()),
+    path("resources/bulk-reject/", BulkRejectView.as_view()),
+    path("resources/uploads/", UploadSessionCreateView.as_view()),
+    path("resources/uploads/<str:upload_id>/", UploadSessionDetailView.as_view()),
+    path("resources/uploads/<str:upload_id>/parts/<int:part>/", UploadPartView.as_view()),
+    path("resources/uploads/<str:upload_id>/complete/", UploadCompleteView.as_view()),
     path("resources/<str:resource_id>/", ResourceDetailView.as_view()),
     path("resources/<str:resource_id>/download/", ResourceDownloadView.as_view()),
+    path("resources/<str:resource_id>/preview/", ResourcePreviewView.as_view()),
     path("resources/<str:resource_id>/approve/", ResourceApproveView.as_view()),
     path("resources/<str:resource_id>/reject/", ResourceRejectView.as_view()),
 ]
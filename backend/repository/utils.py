@@ -19,19 +19,19 @@ def validate_and_get_format(file):
     Returns the format string ('pdf', 'ppt', 'doc', 'image').
     Raises ValueError on failure.
     """
-    ext = file.name.rsplit(".", 1)[-1].lower()
+    return validate_name_and_size(file.name, file.size)
+
+
+def validate_name_and_size(name, size):
+    """validate_and_get_format for a file that has not been received yet."""
+    ext = name.rsplit(".", 1)[-1].lower()
     if ext not in ALLOWED_EXTENSIONS:
         raise ValueError(f"File type '.{ext}' is not allowed.")
-    if file.size > settings.MAX_UPLOAD_SIZE:
+    if size > settings.MAX_UPLOAD_SIZE:
         raise ValueError("File size exceeds 50MB limit.")
     return ALLOWED_EXTENSIONS[ext]
 
 
-def get_upload_path(semester, subject_code, filename):
-    """Returns relative path from MEDIA_ROOT."""
-    return os.path.join("uploads", str(semester), subject_code, filename)
-
-
 def get_full_path(relative_path):
     """Returns absolute path on disk."""
     if not relative_path:
@@ -1,8 +1,10 @@
 import os
-import threading
+import json
 import mimetypes
-from datetime import datetime
-from rag.pipeline import process
+from datetime import datetime, timedelta
+from rag import jobs
+from rag.models import IngestionJob, JobItem, ResourceChunk
+from rag.pipeline import process, process_batch
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
@@ -12,57 +14,45 @@ from bson import ObjectId
 
 from accounts.models import User
 from accounts.permissions import IsHOD, IsFacultyOrHOD
-from .models import Subject, Resource
+from core import etags, versions
+from search import index as resource_index
+from search.cache import user_scope
+from search import neighbors
+from .models import Subject, Resource, UploadSession
+from .refcache import refs, invalidate_subjects
+from .pagination import keyset_page
+from .counters import downloads
+from .serving import file_response
+from . import previews, storage, uploads
 from .utils import (
     validate_and_get_format,
-    get_upload_path,
+    validate_name_and_size,
     get_full_path,
-    delete_file_if_exists,
 )
 
 
-def generate_embedding(resource_id):
-    """
-    Called in a background thread after a resource is uploaded or approved.
-    Saves the semantic embedding to the resource document.
-    """
-    try:
-        from rag.embedder import embed
-        from .models import Resource
-        from bson import ObjectId
-
-        resource = Resource.objects.get(id=ObjectId(resource_id))
-        
-        # Fetch subject to include it in the embedding text
-        from .models import Subject
-        subject_str = ""
-        try:
-            subject = Subject.objects.get(id=resource.subject_id)
-            subject_str = f"{subject.code} {subject.name}"
-        except Exception:
-            pass
+def user_names(user_ids):
+    """{user id: name} for the given ids, from the reference cache."""
+    return refs.user_names(user_ids)
 
-        text = f"{resource.title} {resource.description} {subject_str} {' '.join(resource.tags or [])}"
-        Resource.objects(id=resource.id).update_one(set__embedding=embed(text))
-
-
-    except Exception as e:
-        print(f"[Embedding] Failed for {resource_id}: {e}")
 
+def subject_refs(subject_ids):
+    """{subject id: (code, name)} for the given ids, from the reference cache."""
+    subjects = refs.subjects()
+    return {
+        sid: (subjects[sid].code, subjects[sid].name)
+        for sid in set(subject_ids) if sid in subjects
+    }
 
 
-def serialize_subject(subject):
+def serialize_subject(subject, faculty_names=None):
     """
     Helper to convert a Subject document to a JSON-serializable dict.
-    Includes faculty name by looking up the User document.
+    Includes the faculty name from the reference cache (refcache.py), or
+    from `faculty_names` when serializing many (see serialize_subjects).
     """
-    faculty_name = None
-    if subject.faculty_id:
-        try:
-            faculty = User.objects.get(id=subject.faculty_id)
-            faculty_name = faculty.name
-        except Exception:
-            pass
+    if faculty_names is None:
+        faculty_names = user_names([subject.faculty_id])
 
     return {
         "id": str(subject.id),
@@ -70,29 +60,38 @@ def serialize_subject(subject):
         "name": subject.name,
         "semester": subject.semester,
         "faculty_id": str(subject.faculty_id) if subject.faculty_id else None,
-        "faculty_name": faculty_name,
+        "faculty_name": faculty_names.get(subject.faculty_id),
         "created_at": subject.created_at.isoformat() + "Z",
     }
 
 
-def serialize_resource(resource, request=None):
-    from accounts.models import User
-    from repository.models import Subject
+def serialize_subjects(subjects):
+    """Serializes many subjects with one reference cache lookup for all faculty names."""
+    subjects = list(subjects)
+    faculty_names = user_names(s.faculty_id for s in subjects)
+    return [serialize_subject(s, faculty_names) for s in subjects]
 
-    uploader_name = None
-    try:
-        uploader = User.objects.get(id=resource.uploaded_by)
-        uploader_name = uploader.name
-    except Exception:
-        pass
 
-    subject_code = subject_name = None
-    try:
-        subject = Subject.objects.get(id=resource.subject_id)
-        subject_code = subject.code
-        subject_name = subject.name
-    except Exception:
-        pass
+def serialize_resources(resources):
+    """
+    Serializes a result set with one reference cache lookup for the
+    distinct uploaders and one for the distinct subjects; only uploaders the
+    cache has not seen yet cost a query.
+    """
+    resources = list(resources)
+    users = user_names(r.uploaded_by for r in resources)
+    subjects = subject_refs(r.subject_id for r in resources)
+    return [serialize_resource(r, users=users, subjects=subjects) for r in resources]
+
+
+def serialize_resource(resource, request=None, users=None, subjects=None):
+    if users is None:
+        users = user_names([resource.uploaded_by])
+    if subjects is None:
+        subjects = subject_refs([resource.subject_id])
+
+    uploader_name = users.get(resource.uploaded_by)
+    subject_code, subject_name = subjects.get(resource.subject_id, (None, None))
 
     base = {
         "id": str(resource.id),
@@ -120,12 +119,18 @@ def serialize_resource(resource, request=None):
         base["original_filename"] = resource.original_filename
         if resource.file_path:
             base["file_url"] = f"http://localhost:8000/media/{resource.file_path}"
+        base["preview_url"] = f"http://localhost:8000/api/v1/resources/{resource.id}/preview/"
     else:
         base["url"] = resource.url
 
     return base
 
 
+# Version stamps each cached response depends on (see core/etags.py)
+SUBJECT_STAMPS = ("subjects", "users")
+RESOURCE_STAMPS = ("resources", "downloads", "subjects", "users")
+
+
 class SubjectListCreateView(APIView):
     """
     GET: List all subjects, optionally filtered by semester.
@@ -138,6 +143,10 @@ class SubjectListCreateView(APIView):
         return [IsAuthenticated()]
 
     def get(self, request):
+        tag = etags.etag(SUBJECT_STAMPS, "subjects", user_scope(request.user), etags.query_key(request))
+        if cached := etags.not_modified(request, tag):
+            return cached
+
         semester = request.query_params.get("semester")
         
         if request.user.role == "faculty":
@@ -150,9 +159,9 @@ class SubjectListCreateView(APIView):
                 qs = qs.filter(semester=int(semester))
             except ValueError:
                 return Response({"error": "Invalid semester parameter."}, status=400)
-        return Response(
-            {"count": qs.count(), "results": [serialize_subject(s) for s in qs]}
-        )
+        return etags.tagged(Response(
+            {"count": qs.count(), "results": serialize_subjects(qs)}
+        ), tag)
 
     def post(self, request):
         data = request.data
@@ -186,6 +195,8 @@ class SubjectListCreateView(APIView):
             faculty.subject_ids.append(subject.id)
             faculty.save()
 
+        invalidate_subjects()
+        versions.bump("resources")   # new subject for search suggestions
         return Response(serialize_subject(subject), status=201)
 
 
@@ -208,6 +219,8 @@ class SubjectDetailView(APIView):
         if not subject:
             return Response({"error": "Subject not found."}, status=404)
 
+        old_code = subject.code
+        old_subject = (subject.code, subject.name, subject.semester)
         data = request.data
         if "name" in data:
             subject.name = data["name"]
@@ -243,6 +256,11 @@ class SubjectDetailView(APIView):
                 return Response({"error": "Invalid faculty_id."}, status=400)
 
         subject.save()
+        invalidate_subjects()
+        if subject.code != old_code:
+            neighbors.rename_subject(subject.id, subject.code)
+        if (subject.code, subject.name, subject.semester) != old_subject:
+            versions.bump("resources")   # search indexes carry subject code/name/semester
         return Response(serialize_subject(subject))
 
     def delete(self, request, subject_id):
@@ -264,6 +282,8 @@ class SubjectDetailView(APIView):
                 faculty.save()
 
         subject.delete()
+        invalidate_subjects()
+        versions.bump("resources")
         return Response({"message": "Subject deleted."})
 
 
@@ -275,11 +295,78 @@ class SemesterListView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
+        tag = etags.etag(("subjects",), "semesters", user_scope(request.user))
+        if cached := etags.not_modified(request, tag):
+            return cached
+
         if request.user.role == "faculty":
             semesters = Subject.objects(id__in=request.user.subject_ids).distinct("semester")
         else:
             semesters = Subject.objects.distinct("semester")
-        return Response({"semesters": sorted(semesters)})
+        return etags.tagged(Response({"semesters": sorted(semesters)}), tag)
+
+
+class UploadRejected(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_tags(raw_tags):
+    if isinstance(raw_tags, str):
+        return [t.strip() for t in raw_tags.split(",") if t.strip()]
+    if isinstance(raw_tags, list):
+        return raw_tags
+    return []
+
+
+def new_resource(user, data, resource_type):
+    """
+    Unsaved Resource from upload metadata, after the checks every upload
+    path shares (required fields, subject, role scope).
+    Raises UploadRejected on failure.
+    """
+    if resource_type not in ["file", "url"]:
+        raise UploadRejected("resource_type must be 'file' or 'url'.")
+
+    for field in ["title", "semester", "subject_id"]:
+        if not data.get(field):
+            raise UploadRejected(f"'{field}' is required.")
+
+    # Validate subject exists
+    try:
+        subject = Subject.objects.get(id=ObjectId(data["subject_id"]))
+    except Exception:
+        raise UploadRejected("Subject not found.", status=404)
+
+    # Enforce role-based upload limits
+    if user.role == "student" and int(data["semester"]) != user.semester:
+        raise UploadRejected("You can only upload resources to your own semester.", status=403)
+    elif user.role == "faculty" and subject.id not in user.subject_ids:
+        raise UploadRejected("You can only upload resources to your assigned subjects.", status=403)
+
+    return Resource(
+        title=data["title"],
+        description=data.get("description", ""),
+        resource_type=resource_type,
+        semester=int(data["semester"]),
+        subject_id=subject.id,
+        unit=data.get("unit", ""),
+        tags=parse_tags(data.get("tags", "")),
+        uploaded_by=user.id,
+        uploader_role=user.role,
+        # Faculty/HOD uploads are live immediately; student uploads need approval
+        status="approved" if user.role in ["faculty", "hod"] else "pending",
+    )
+
+
+def publish(resource):
+    """Saves a new resource, adds it to the search index and starts ingestion."""
+    resource.save()
+    resource_index.sync(resource.id)
+
+    # Single ingestion pass: resource embedding + RAG chunks in background
+    jobs.submit(process, str(resource.id))
 
 
 class ResourceUploadView(APIView):
@@ -288,53 +375,12 @@ class ResourceUploadView(APIView):
     def post(self, request):
         data = request.data
         resource_type = data.get("resource_type")
-
-        if resource_type not in ["file", "url"]:
-            return Response(
-                {"error": "resource_type must be 'file' or 'url'."}, status=400
-            )
-
-        for field in ["title", "semester", "subject_id"]:
-            if not data.get(field):
-                return Response({"error": f"'{field}' is required."}, status=400)
-
-        # Validate subject exists
         try:
-            subject = Subject.objects.get(id=ObjectId(data["subject_id"]))
-        except Exception:
-            return Response({"error": "Subject not found."}, status=404)
-
-        # Enforce role-based upload limits
-        if request.user.role == "student" and int(data["semester"]) != request.user.semester:
-            return Response({"error": "You can only upload resources to your own semester."}, status=403)
-        elif request.user.role == "faculty" and subject.id not in request.user.subject_ids:
-            return Response({"error": "You can only upload resources to your assigned subjects."}, status=403)
-
-        # Determine status
-        status = "approved" if request.user.role in ["faculty", "hod"] else "pending"
-
-        # Parse tags
-        raw_tags = data.get("tags", "")
-        if isinstance(raw_tags, str):
-            tags = [t.strip() for t in raw_tags.split(",") if t.strip()]
-        elif isinstance(raw_tags, list):
-            tags = raw_tags
-        else:
-            tags = []
-
-        resource = Resource(
-            title=data["title"],
-            description=data.get("description", ""),
-            resource_type=resource_type,
-            semester=int(data["semester"]),
-            subject_id=subject.id,
-            unit=data.get("unit", ""),
-            tags=tags,
-            uploaded_by=request.user.id,
-            uploader_role=request.user.role,
-            status=status,
-        )
+            resource = new_resource(request.user, data, resource_type)
+        except UploadRejected as e:
+            return Response({"error": str(e)}, status=e.status)
 
+        blobs = []
         if resource_type == "file":
             file = request.FILES.get("file")
             if not file:
@@ -345,16 +391,12 @@ class ResourceUploadView(APIView):
             except ValueError as e:
                 return Response({"error": str(e)}, status=400)
 
-            # Build storage path and save
-            relative_path = get_upload_path(data["semester"], subject.code, file.name)
-            full_path = get_full_path(relative_path)
-            os.makedirs(os.path.dirname(full_path), exist_ok=True)
-
-            with open(full_path, "wb+") as dest:
-                for chunk in file.chunks():
-                    dest.write(chunk)
+            # Content-addressed: identical files share one blob
+            relative_path, file_hash = storage.store_upload(file)
+            blobs.append((relative_path, file_hash))
 
             resource.file_path = relative_path
+            resource.file_hash = file_hash
             resource.file_format = file_format
             resource.original_filename = file.name
 
@@ -365,64 +407,348 @@ class ResourceUploadView(APIView):
                 )
             resource.url = data["url"]
 
-        resource.save()
+        try:
+            publish(resource)
+        except Exception:
+            storage.abandon(blobs)
+            raise
+        storage.adopted(blobs)
+        return Response(serialize_resource(resource), status=201)
+
+
+BULK_SHARED_FIELDS = (
+    "description", "resource_type", "semester", "subject_id", "unit",
+    "tags", "uploaded_by", "uploader_role", "status",
+)
+
+
+class BulkUploadView(APIView):
+    """
+    POST: Upload many files with shared metadata (semester, subject_id,
+    unit, tags, description) in one multipart request: repeat `files`, and
+    optionally `titles` in the same order (defaults to the file names).
+    All files are validated before any is stored. Resources are inserted
+    together and indexed by one batched job; poll
+    /ingestion/jobs/<job_id>/ for per-file progress.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        data = request.data
+        files = request.FILES.getlist("files")
+        if not files:
+            return Response({"error": "No files provided."}, status=400)
+        if len(files) > settings.BULK_UPLOAD_MAX_FILES:
+            return Response(
+                {"error": f"At most {settings.BULK_UPLOAD_MAX_FILES} files per upload."}, status=400
+            )
+        titles = data.getlist("titles")
+        if titles and len(titles) != len(files):
+            return Response({"error": "'titles' must match 'files' one to one."}, status=400)
+        titles = titles or [f.name.rsplit(".", 1)[0] for f in files]
+        # insert() skips model validation, so check the one per-file required field here
+        if not all(t.strip() for t in titles):
+            return Response({"error": "Every title must be non-empty."}, status=400)
+
+        # Shared metadata and scope are checked once
+        try:
+            template = new_resource(request.user, {**data.dict(), "title": titles[0]}, "file")
+        except UploadRejected as e:
+            return Response({"error": str(e)}, status=e.status)
+
+        formats, errors = [], []
+        for f in files:
+            try:
+                formats.append(validate_and_get_format(f))
+            except ValueError as e:
+                errors.append({"file": f.name, "error": str(e)})
+        if errors:
+            return Response({"error": "Some files were rejected.", "files": errors}, status=400)
+
+        resources, blobs = [], []
+        try:
+            for f, title, file_format in zip(files, titles, formats):
+                relative_path, file_hash = storage.store_upload(f)
+                blobs.append((relative_path, file_hash))
+                resource = Resource(**{name: getattr(template, name) for name in BULK_SHARED_FIELDS})
+                resource.title = title.strip()
+                resource.file_path = relative_path
+                resource.file_hash = file_hash
+                resource.file_format = file_format
+                resource.original_filename = f.name
+                resources.append(resource)
+            resources = Resource.objects.insert(resources)
+        except Exception:
+            storage.abandon(blobs)
+            raise
+        storage.adopted(blobs)
+        resource_index.sync(*[r.id for r in resources])
+
+        job = IngestionJob(
+            user_id=request.user.id,
+            items=[JobItem(resource_id=r.id, title=r.title) for r in resources],
+        )
+        job.save()
+        jobs.submit(process_batch, str(job.id))
+
+        return Response(
+            {"job_id": str(job.id), "count": len(resources), "results": serialize_resources(resources)},
+            status=201,
+        )
+
+
+UPLOAD_FIELDS = ["title", "description", "semester", "subject_id", "unit", "tags"]
+
 
-        # Trigger embedding and RAG pipeline generation in background
-        threading.Thread(
-            target=generate_embedding, args=(str(resource.id),), daemon=True
-        ).start()
-        threading.Thread(
-            target=process, args=(str(resource.id), resource.status), daemon=True
-        ).start()
+def serialize_upload(session):
+    """`received` holds [start, end) byte ranges already stored."""
+    return {
+        "upload_id": str(session.id),
+        "filename": session.filename,
+        "size": session.size,
+        "part_size": session.part_size,
+        "parts": -(-session.size // session.part_size),
+        "received": [[0, session.received]] if session.received else [],
+        "next_part": session.received // session.part_size,
+        "complete": session.received == session.size,
+        "expires_at": session.expires_at.isoformat() + "Z",
+    }
+
+
+def get_upload(request, upload_id):
+    try:
+        return UploadSession.objects.get(id=ObjectId(upload_id), user_id=request.user.id)
+    except Exception:
+        return None
+
+
+class UploadSessionCreateView(APIView):
+    """
+    POST: Start a resumable file upload. Takes the same fields as a direct
+    upload plus `filename` and `size` (bytes) instead of the file itself.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        data = request.data
+        try:
+            new_resource(request.user, data, "file")
+            size = int(data.get("size", 0))
+            if size <= 0 or not data.get("filename"):
+                raise UploadRejected("'filename' and a positive 'size' are required.")
+            file_format = validate_name_and_size(data["filename"], size)
+        except UploadRejected as e:
+            return Response({"error": str(e)}, status=e.status)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        uploads.remove_stale_parts()
+        session = UploadSession(
+            user_id=request.user.id,
+            metadata={k: data.get(k) for k in UPLOAD_FIELDS if k in data},
+            filename=data["filename"],
+            file_format=file_format,
+            size=size,
+            part_size=settings.UPLOAD_PART_SIZE,
+            expires_at=datetime.utcnow() + timedelta(seconds=settings.UPLOAD_SESSION_TTL),
+        )
+        session.save()
+        return Response(serialize_upload(session), status=201)
+
+
+class UploadSessionDetailView(APIView):
+    """
+    GET: Received byte ranges, so a client can resume after a dropped connection.
+    DELETE: Abort the upload.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, upload_id):
+        session = get_upload(request, upload_id)
+        if not session:
+            return Response({"error": "Upload not found."}, status=404)
+        return Response(serialize_upload(session))
+
+    def delete(self, request, upload_id):
+        session = get_upload(request, upload_id)
+        if not session:
+            return Response({"error": "Upload not found."}, status=404)
+        uploads.discard(session)
+        session.delete()
+        return Response({"message": "Upload aborted."})
+
+
+class UploadPartView(APIView):
+    """
+    PUT: Raw bytes of part `part` (offset part * part_size). Parts must
+    arrive in order; re-sending a received part is harmless.
+    """
 
+    permission_classes = [IsAuthenticated]
+
+    def put(self, request, upload_id, part):
+        session = get_upload(request, upload_id)
+        if not session:
+            return Response({"error": "Upload not found."}, status=404)
+        try:
+            uploads.write_part(
+                session, part, request.stream, int(request.META.get("CONTENT_LENGTH") or 0)
+            )
+        except uploads.PartRejected as e:
+            # Report where the session really is, not what this request saw
+            session = get_upload(request, upload_id) or session
+            return Response({"error": str(e), **serialize_upload(session)}, status=e.status)
+        return Response(serialize_upload(session))
+
+
+class UploadCompleteView(APIView):
+    """
+    POST: Turn a fully received upload into a Resource (same response as a
+    direct upload).
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, upload_id):
+        session = get_upload(request, upload_id)
+        if not session:
+            return Response({"error": "Upload not found."}, status=404)
+        if session.received != session.size:
+            return Response(
+                {"error": "Upload is incomplete.", **serialize_upload(session)}, status=409
+            )
+
+        # Re-check metadata and scope: they may have changed since the upload started
+        try:
+            resource = new_resource(request.user, session.metadata, "file")
+        except UploadRejected as e:
+            return Response({"error": str(e)}, status=e.status)
+
+        # Only one request may finish a session; a retry after success finds it gone (404)
+        if not uploads.claim(session):
+            return Response({"error": "Upload is already being completed."}, status=409)
+        try:
+            relative_path, file_hash = uploads.finish(session)
+        except Exception:
+            uploads.unclaim(session)
+            raise
+
+        resource.file_path = relative_path
+        resource.file_hash = file_hash
+        resource.file_format = session.file_format
+        resource.original_filename = session.filename
+        try:
+            publish(resource)
+        except Exception:
+            # The staging file is gone, so the session cannot be retried
+            storage.abandon([(relative_path, file_hash)])
+            session.delete()
+            raise
+        storage.adopted([(relative_path, file_hash)])
+
+        session.delete()
         return Response(serialize_resource(resource), status=201)
 
 
+FACET_FIELDS = {
+    "semester": "$semester",
+    "subject": "$subject_id",
+    "file_format": {"$cond": [{"$eq": ["$resource_type", "url"]}, "url", "$file_format"]},
+}
+
+
+def resource_facets(scope_match, filter_matches):
+    """
+    Counts per semester, subject and file format in one `$facet` aggregation.
+    Each facet applies every active filter except its own, so the FilterBar
+    can show how many results picking another value would give.
+    """
+    facets = {}
+    for name, key in FACET_FIELDS.items():
+        others = [m for f, m in filter_matches.items() if f != name]
+        stages = [{"$match": {"$and": others}}] if others else []
+        stages.append({"$group": {"_id": key, "count": {"$sum": 1}}})
+        stages.append({"$sort": {"count": -1}})
+        facets[name] = stages
+
+    pipeline = [{"$match": scope_match}, {"$facet": facets}]
+    result = next(Resource._get_collection().aggregate(pipeline), {})
+    return {
+        name: [
+            {"value": str(b["_id"]) if isinstance(b["_id"], ObjectId) else b["_id"], "count": b["count"]}
+            for b in result.get(name, [])
+            if b["_id"] is not None
+        ]
+        for name in FACET_FIELDS
+    }
+
 
 class ResourceListView(APIView):
+    """
+    GET: Approved resources in the user's scope, newest first, paginated by
+    cursor (see pagination.keyset_page).
+    `?facets=1` adds per-semester/subject/format counts for the FilterBar.
+    """
+
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
+        tag = etags.etag(RESOURCE_STAMPS, "resources", user_scope(request.user), etags.query_key(request))
+        if cached := etags.not_modified(request, tag):
+            return cached
+
         qs = Resource.objects(status="approved")
+        scope_match = {"status": "approved"}
+        filter_matches = {}
 
         if request.user.role == "student":
             qs = qs.filter(semester=request.user.semester)
+            scope_match["semester"] = request.user.semester
         elif request.user.role == "faculty":
             qs = qs.filter(subject_id__in=request.user.subject_ids)
-            
+            scope_match["subject_id"] = {"$in": list(request.user.subject_ids)}
+
         if semester := request.query_params.get("semester"):
             qs = qs.filter(semester=int(semester))
+            filter_matches["semester"] = {"semester": int(semester)}
         if subject := request.query_params.get("subject"):
             qs = qs.filter(subject_id=ObjectId(subject))
+            filter_matches["subject"] = {"subject_id": ObjectId(subject)}
         if faculty := request.query_params.get("faculty"):
             qs = qs.filter(uploaded_by=ObjectId(faculty))
+            filter_matches["faculty"] = {"uploaded_by": ObjectId(faculty)}
         if fmt := request.query_params.get("file_format"):
             if fmt == "url":
                 qs = qs.filter(resource_type="url")
+                filter_matches["file_format"] = {"resource_type": "url"}
             else:
                 qs = qs.filter(file_format=fmt)
+                filter_matches["file_format"] = {"file_format": fmt}
 
-        # Pagination
-        page = int(request.query_params.get("page", 1))
-        page_size = 20
-        start = (page - 1) * page_size
-        total = qs.count()
-        results = list(qs.order_by("-upload_date")[start : start + page_size])
+        count_key = ("list", repr(sorted(scope_match.items())), repr(sorted(filter_matches.items())))
+        try:
+            data = keyset_page(request, qs, count_key)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        data["results"] = serialize_resources(data["results"])
 
-        return Response(
-            {
-                "count": total,
-                "page": page,
-                "page_size": page_size,
-                "results": [serialize_resource(r) for r in results],
-            }
-        )
+        if request.query_params.get("facets") in ("1", "true"):
+            data["facets"] = resource_facets(scope_match, filter_matches)
+        return etags.tagged(Response(data), tag)
 
 
 class ResourceDetailView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, resource_id):
+        # Visibility depends on who is asking, so the tag does too
+        tag = etags.etag(RESOURCE_STAMPS, "resource", resource_id, str(request.user.id), user_scope(request.user))
+        if cached := etags.not_modified(request, tag):
+            return cached
+
         try:
             resource = Resource.objects.get(id=ObjectId(resource_id))
         except Exception:
@@ -440,7 +766,7 @@ class ResourceDetailView(APIView):
         elif request.user.role == "faculty" and resource.subject_id not in request.user.subject_ids:
             return Response({"error": "Resource not found."}, status=404)
 
-        return Response(serialize_resource(resource))
+        return etags.tagged(Response(serialize_resource(resource)), tag)
 
     def delete(self, request, resource_id):
         try:
@@ -455,8 +781,10 @@ class ResourceDetailView(APIView):
         if not (is_uploader or is_hod or is_faculty_owner):
             return Response({"error": "Permission denied."}, status=403)
 
-        delete_file_if_exists(resource.file_path)
         resource.delete()
+        storage.release(resource)
+        resource_index.drop(resource.id)
+        neighbors.remove(resource.id)
         
         try:
             from rag.models import ResourceChunk
@@ -503,18 +831,73 @@ class ResourceDownloadView(APIView):
         if not full_path or not os.path.exists(full_path):
             return Response({"error": "File not found on disk."}, status=404)
 
-        # Increment download count
-        resource.download_count += 1
-        resource.save()
-
-        content_type, _ = mimetypes.guess_type(full_path)
-        response = FileResponse(
-            open(full_path, "rb"),
-            content_type=content_type or "application/octet-stream",
-        )
-        response["Content-Disposition"] = (
-            f'attachment; filename="{resource.original_filename}"'
+        response, counts = file_response(
+            request, resource.file_path, full_path, resource.original_filename
         )
+        if counts:
+            downloads.increment(resource.id)
+        return response
+
+
+class ResourcePreviewView(APIView):
+    """
+    GET: A cached preview instead of the full file.
+    `?kind=thumb` (default for PDFs and images) or `?kind=page&page=N`
+    returns an image; `?kind=text` (default otherwise) returns a snippet.
+    Previews are keyed by file content, so they are cacheable forever.
+    """
+
+    authentication_classes = [QueryParamMongoJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, resource_id):
+        try:
+            resource = Resource.objects.get(id=ObjectId(resource_id))
+        except Exception:
+            return Response({"error": "Resource not found."}, status=404)
+
+        if resource.status != "approved":
+            if (
+                str(resource.uploaded_by) != str(request.user.id)
+                and request.user.role not in ["faculty", "hod"]
+            ):
+                return Response({"error": "Resource not found."}, status=404)
+        elif request.user.role == "student" and resource.semester != request.user.semester:
+            return Response({"error": "Resource not found."}, status=404)
+        elif request.user.role == "faculty" and resource.subject_id not in request.user.subject_ids:
+            return Response({"error": "Resource not found."}, status=404)
+
+        if resource.resource_type == "url":
+            return Response({"error": "URL resources have no preview."}, status=400)
+
+        default_kind = "thumb" if resource.file_format in ("pdf", "image") else "text"
+        kind = request.query_params.get("kind", default_kind)
+        try:
+            page = int(request.query_params.get("page", 1))
+        except ValueError:
+            return Response({"error": "Invalid page parameter."}, status=400)
+
+        tag = f'"{previews.cache_key(resource)}-{kind}-{page}"'
+        if cached := etags.not_modified(request, tag):
+            response = cached
+        else:
+            path = previews.find(resource, kind, page)
+            if path is None and previews.generate(resource):
+                path = previews.find(resource, kind, page)
+            if path is None:
+                return Response(
+                    {"error": "Preview not available.", "available": previews.available(resource)},
+                    status=404,
+                )
+
+            if kind == "text":
+                with open(path) as f:
+                    response = Response(json.load(f))
+            else:
+                content_type, _ = mimetypes.guess_type(path)
+                response = FileResponse(open(path, "rb"), content_type=content_type)
+            response["ETag"] = tag
+        response["Cache-Control"] = "private, max-age=31536000, immutable"
         return response
 
 
@@ -537,7 +920,7 @@ class ResourcePendingView(APIView):
         return Response(
             {
                 "count": len(results),
-                "results": [serialize_resource(r) for r in results],
+                "results": serialize_resources(results),
             }
         )
 
@@ -555,21 +938,12 @@ class ResourceMySubmissionsView(APIView):
             
         qs = Resource.objects(uploaded_by=request.user.id)
         
-        # Pagination
-        page = int(request.query_params.get("page", 1))
-        page_size = 20
-        start = (page - 1) * page_size
-        total = qs.count()
-        results = list(qs.order_by("-upload_date")[start : start + page_size])
-
-        return Response(
-            {
-                "count": total,
-                "page": page,
-                "page_size": page_size,
-                "results": [serialize_resource(r) for r in results],
-            }
-        )
+        try:
+            data = keyset_page(request, qs, ("submissions", request.user.id))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        data["results"] = serialize_resources(data["results"])
+        return Response(data)
 
 
 class ResourceApproveView(APIView):
@@ -598,11 +972,10 @@ class ResourceApproveView(APIView):
         resource.reviewed_by = request.user.id
         resource.reviewed_at = datetime.utcnow()
         resource.save()
+        resource_index.sync(resource.id)
 
         # Update RAG pipeline status to 'approved'
-        threading.Thread(
-            target=process, args=(str(resource.id), "approved"), daemon=True
-        ).start()
+        jobs.submit(process, str(resource.id))
 
 
         return Response(
@@ -635,13 +1008,14 @@ class ResourceRejectView(APIView):
             if resource.subject_id not in request.user.subject_ids:
                 return Response({"error": "You do not own this subject."}, status=403)
 
-        # Delete file from disk
-        delete_file_if_exists(resource.file_path)
-
         resource.status = "rejected"
         resource.reviewed_by = request.user.id
         resource.reviewed_at = datetime.utcnow()
         resource.save()
+        # Delete file from disk unless another resource shares the blob
+        storage.release(resource)
+        resource_index.sync(resource.id)
+        neighbors.remove(resource.id)
 
         # Delete chunks for rejected resource
         try:
@@ -658,3 +1032,127 @@ class ResourceRejectView(APIView):
                 "status": "rejected",
             }
         )
+
+
+def review_targets(request):
+    """
+    Splits `ids` from the request body into pending resources the reviewer
+    may act on and skipped entries with a reason, using one query.
+    Returns (resources, skipped) or an error Response.
+    """
+    ids = request.data.get("ids")
+    if not isinstance(ids, list) or not ids:
+        return Response({"error": "'ids' must be a non-empty list."}, status=400)
+    if len(ids) > settings.BULK_REVIEW_MAX:
+        return Response({"error": f"At most {settings.BULK_REVIEW_MAX} ids per request."}, status=400)
+
+    oids, skipped = [], []
+    for rid in dict.fromkeys(map(str, ids)):
+        try:
+            oids.append(ObjectId(rid))
+        except Exception:
+            skipped.append({"id": rid, "error": "Resource not found."})
+
+    found = {
+        r.id: r for r in Resource.objects(id__in=oids).only(
+            "title", "status", "subject_id", "file_path", "file_hash", "indexing_status"
+        )
+    }
+    resources = []
+    for oid in oids:
+        resource = found.get(oid)
+        if resource is None:
+            skipped.append({"id": str(oid), "error": "Resource not found."})
+        elif resource.status != "pending":
+            skipped.append({"id": str(oid), "error": "Resource is not pending."})
+        elif request.user.role == "faculty" and resource.subject_id not in request.user.subject_ids:
+            skipped.append({"id": str(oid), "error": "You do not own this subject."})
+        else:
+            resources.append(resource)
+    return resources, skipped
+
+
+def mark_reviewed(request, resources, status):
+    """Applies the review with one update_many; returns the ids actually changed."""
+    ids = [r.id for r in resources]
+    Resource.objects(id__in=ids, status="pending").update(
+        set__status=status, set__reviewed_by=request.user.id, set__reviewed_at=datetime.utcnow()
+    )
+    # Anything reviewed concurrently by someone else is left alone
+    changed = set(Resource.objects(id__in=ids, status=status, reviewed_by=request.user.id).distinct("id"))
+    return [r for r in resources if r.id in changed]
+
+
+class BulkApproveView(APIView):
+    """
+    POST: Approve many pending resources: {"ids": [...]}.
+    Already indexed resources only have their chunks flipped to approved;
+    the rest are indexed by one batched job.
+    """
+
+    permission_classes = [IsAuthenticated, IsFacultyOrHOD]
+
+    def post(self, request):
+        targets = review_targets(request)
+        if isinstance(targets, Response):
+            return targets
+        resources, skipped = targets
+
+        resources = mark_reviewed(request, resources, "approved") if resources else []
+        ids = [r.id for r in resources]
+        job_id = None
+        if ids:
+            indexed = [r.id for r in resources if r.indexing_status == "completed"]
+            # After the status update, so a run finishing in between is covered either way
+            ResourceChunk.objects(resource_id__in=ids, status="pending").update(set__status="approved")
+            resource_index.sync(*ids)
+            if indexed:
+                neighbors.patch(*indexed)
+
+            # Not yet (or no longer) indexed: one batched job instead of a thread each.
+            # A run still in flight re-reads the status when it writes chunks.
+            unindexed = [r for r in resources if r.indexing_status not in ("completed", "processing")]
+            if unindexed:
+                job = IngestionJob(
+                    user_id=request.user.id,
+                    items=[JobItem(resource_id=r.id, title=r.title) for r in unindexed],
+                )
+                job.save()
+                job_id = str(job.id)
+                jobs.submit(process_batch, job_id)
+
+        return Response({
+            "message": f"{len(ids)} resources approved.",
+            "approved": [str(rid) for rid in ids],
+            "job_id": job_id,
+            "skipped": skipped,
+        })
+
+
+class BulkRejectView(APIView):
+    """
+    POST: Reject many pending resources: {"ids": [...]}. Chunks are removed
+    with one delete and files unless another resource shares them.
+    """
+
+    permission_classes = [IsAuthenticated, IsFacultyOrHOD]
+
+    def post(self, request):
+        targets = review_targets(request)
+        if isinstance(targets, Response):
+            return targets
+        resources, skipped = targets
+
+        resources = mark_reviewed(request, resources, "rejected") if resources else []
+        ids = [r.id for r in resources]
+        if ids:
+            ResourceChunk.objects(resource_id__in=ids).delete()
+            storage.release_many(resources)
+            resource_index.sync(*ids)
+            neighbors.remove(*ids)
+
+        return Response({
+            "message": f"{len(ids)} resources rejected.",
+            "rejected": [str(rid) for rid in ids],
+            "skipped": skipped,
+        })
@@ -0,0 +1,79 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class ResultCache:
+    """Thread-safe LRU cache with a per-entry TTL."""
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+results = ResultCache(settings.SEARCH_CACHE_SIZE, settings.SEARCH_CACHE_TTL)
+query_vectors = ResultCache(settings.SEARCH_CACHE_SIZE, settings.SEARCH_CACHE_TTL)
+
+
+def normalize_query(q):
+    return ' '.join(q.lower().split())
+
+
+def user_scope(user):
+    """The part of the user that decides which resources they can see."""
+    if user.role == "student":
+        return ("semester", user.semester)
+    if user.role == "faculty":
+        return ("subjects", tuple(sorted(str(s) for s in user.subject_ids)))
+    return ("all",)
+
+
+def embed_query(q):
+    """Query embedding, cached by normalized text (independent of data versions)."""
+    key = normalize_query(q)
+    vec = query_vectors.get(key)
+    if vec is None:
+        from rag.embedder import embed
+        vec = embed(key)
+        query_vectors.set(key, vec)
+    return vec
+
+
+def embed_queries(queries):
+    """Embeddings for many queries; uncached ones go through one embed_many call."""
+    keys = [normalize_query(q) for q in queries]
+    vecs = {k: query_vectors.get(k) for k in set(keys)}
+    missing = [k for k, v in vecs.items() if v is None]
+    if missing:
+        from rag.embedder import embed_many
+        for k, vec in zip(missing, embed_many(missing)):
+            query_vectors.set(k, vec)
+            vecs[k] = vec
+    return [vecs[k] for k in keys]
@@ -0,0 +1,298 @@
+"""
+Process-level resource vector index.
+
+Holds the unit-normalized embedding of every non-rejected resource together
+with the columns search and recommendations filter on, so neither has to
+re-query Mongo or decode embedding lists per request. A BM25 keyword index
+and a typeahead prefix index over the same resources are maintained
+alongside it. The index is built
+lazily on first use and kept current by the repository write paths and the
+ingestion pipeline through `sync()` / `drop()`. Both bump the "resources"
+version stamp with the ids they touched; a worker that sees a stamp it did
+not apply itself re-reads just those ids (versions.changes_since) and only
+rebuilds when it is too far behind or a bump named no ids.
+
+Readers take an immutable `Snapshot`; writers build a new one (copy-on-write),
+so queries never see a half-applied update and need no lock.
+"""
+import threading
+
+import numpy as np
+from bson import ObjectId
+
+from django.conf import settings
+
+from core import versions
+from repository.models import Resource
+from repository.refcache import refs
+from .keyword import KeywordIndex
+from .suggest import SuggestIndex
+
+INDEXED_FIELDS = (
+    'status', 'semester', 'subject_id', 'file_format', 'resource_type',
+    'title', 'description', 'tags', 'unit', 'embedding',
+)
+
+
+class Snapshot:
+    COLUMNS = ('ids', 'status', 'semester', 'subject_id', 'file_format',
+               'resource_type', 'has_vec')
+
+    def __init__(self, matrix, **columns):
+        self.matrix = matrix
+        for name in self.COLUMNS:
+            setattr(self, name, columns[name])
+        self.pos = {rid: i for i, rid in enumerate(self.ids)}
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def dim(self):
+        return self.matrix.shape[1]
+
+    def mask(self, status='approved', semester=None, subject_id=None,
+             subject_ids=None, file_format=None, with_vector=False):
+        """Boolean row mask for the given filters (None = no filter)."""
+        m = np.ones(len(self), dtype=bool)
+        if status is not None:
+            m &= self.status == status
+        if semester is not None:
+            m &= self.semester == int(semester)
+        if subject_id is not None:
+            m &= self.subject_id == str(subject_id)
+        if subject_ids is not None:
+            m &= np.isin(self.subject_id, [str(s) for s in subject_ids])
+        if file_format == 'url':
+            m &= self.resource_type == 'url'
+        elif file_format:
+            m &= self.file_format == file_format
+        if with_vector:
+            m &= self.has_vec
+        return m
+
+    def row(self, resource_id):
+        return self.pos.get(str(resource_id))
+
+
+def _rows(resources, dim):
+    """Column values and unit vectors for a list of Resource documents."""
+    vectors = np.zeros((len(resources), dim), dtype=np.float32)
+    has_vec = np.zeros(len(resources), dtype=bool)
+    for i, r in enumerate(resources):
+        if r.embedding and len(r.embedding) == dim:
+            vectors[i] = r.embedding
+            has_vec[i] = True
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+
+    def col(values, dtype=object):
+        return np.array(values, dtype=dtype)
+
+    columns = {
+        'ids': col([str(r.id) for r in resources]),
+        'status': col([r.status for r in resources]),
+        'semester': col([r.semester or 0 for r in resources], dtype=np.int16),
+        'subject_id': col([str(r.subject_id) for r in resources]),
+        'file_format': col([r.file_format for r in resources]),
+        'resource_type': col([r.resource_type for r in resources]),
+        'has_vec': has_vec,
+    }
+    return vectors, columns
+
+
+def _keyword_fields(resource, subjects):
+    subject = subjects.get(resource.subject_id)
+    code, name = (subject.code, subject.name) if subject else ('', '')
+    return {
+        'title': resource.title,
+        'description': resource.description,
+        'tags': ' '.join(resource.tags or []),
+        'unit': resource.unit,
+        'subject': f"{code} {name}",
+    }
+
+
+class ResourceIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._snapshot = None
+        self._version = -1
+        self._refreshing = threading.Lock()
+        self.keywords = KeywordIndex()
+        self.suggestions = SuggestIndex()
+
+    @property
+    def built(self):
+        return self._snapshot is not None
+
+    def snapshot(self):
+        """
+        Current snapshot, building the index from Mongo on first use and
+        catching up on resources other workers changed since this one synced.
+        """
+        version, = versions.current("resources", max_age=settings.SEARCH_VERSION_POLL_SECONDS)
+        if self._snapshot is None or version > self._version:
+            with self._lock:
+                if self._snapshot is None:
+                    # Taken before the read, so writes during the build are replayed next time
+                    self._version = version
+                    self._snapshot = self._build()
+                elif version > self._version:
+                    self._catch_up()
+        return self._snapshot
+
+    def current_suggestions(self):
+        """
+        The prefix index as last built, for typeahead. Only the very first
+        call waits for a build; if the index is behind, it catches up in a
+        background thread and this keystroke is served from the old one.
+        """
+        if self._snapshot is None:
+            self.snapshot()
+            return self.suggestions
+        version, = versions.current("resources", max_age=settings.SEARCH_VERSION_POLL_SECONDS)
+        if version > self._version and self._refreshing.acquire(blocking=False):
+            def refresh():
+                try:
+                    self.snapshot()
+                finally:
+                    self._refreshing.release()
+            threading.Thread(target=refresh, daemon=True).start()
+        return self.suggestions
+
+    def _catch_up(self):
+        latest, changed = versions.changes_since("resources", self._version)
+        self._version = latest
+        if changed is None or len(changed) > settings.SEARCH_INDEX_REPLAY_MAX:
+            self._snapshot = self._build()
+        elif changed:
+            self.refresh(changed)
+
+    def applied(self, version):
+        """
+        Marks a locally applied write so it is not replayed. Bumps by other
+        workers in between are left for the next snapshot() to replay.
+        """
+        with self._lock:
+            if self._version == version - 1:
+                self._version = version
+
+    def refresh(self, resource_ids):
+        """Re-reads the given resources from Mongo, dropping rejected or deleted ones."""
+        try:
+            ids = [ObjectId(str(rid)) for rid in resource_ids]
+            found = list(Resource.vectors(id__in=ids).only(*INDEXED_FIELDS))
+            live = [r for r in found if r.status != 'rejected']
+            live_ids = {str(r.id) for r in live}
+            self.remove([str(rid) for rid in ids if str(rid) not in live_ids])
+            self.upsert(live)
+        except Exception as e:
+            print(f'[Search] Index refresh failed for {resource_ids}: {e}')
+            self.reset()
+
+    def _build(self):
+        resources = list(Resource.vectors(status__ne='rejected').only(*INDEXED_FIELDS))
+        dim = next((len(r.embedding) for r in resources if r.embedding), 0)
+        matrix, columns = _rows(resources, dim)
+
+        keywords = KeywordIndex()
+        suggestions = SuggestIndex()
+        suggestions.adopt_queries(self.suggestions)
+        subjects = refs.subjects()
+        suggestions.load(resources, subjects.values())
+        for r in resources:
+            keywords.add(str(r.id), _keyword_fields(r, subjects))
+        self.keywords, self.suggestions = keywords, suggestions
+
+        print(f'[Search] Resource index built: {len(resources)} resources, dim={dim}')
+        return Snapshot(matrix, **columns)
+
+    def reset(self):
+        """Drops the index; the next query rebuilds it from Mongo."""
+        with self._lock:
+            self._snapshot = None
+
+    def upsert(self, resources):
+        """Adds or replaces rows for the given Resource documents."""
+        with self._lock:
+            snap = self._snapshot
+            if snap is None:
+                return
+            dim = snap.dim or next((len(r.embedding) for r in resources if r.embedding), 0)
+            if snap.dim != dim:
+                # First vector seen (or model changed): re-read everything at the new width
+                self._snapshot = self._build()
+                return
+            keep = np.ones(len(snap), dtype=bool)
+            for r in resources:
+                i = snap.row(r.id)
+                if i is not None:
+                    keep[i] = False
+            matrix, columns = _rows(resources, dim)
+            subjects = refs.subjects()
+            for r in resources:
+                self.keywords.add(str(r.id), _keyword_fields(r, subjects))
+                self.suggestions.set_resource(r)
+            self._snapshot = Snapshot(
+                np.concatenate([snap.matrix[keep], matrix]),
+                **{name: np.concatenate([getattr(snap, name)[keep], columns[name]])
+                   for name in Snapshot.COLUMNS}
+            )
+
+    def remove(self, resource_ids):
+        with self._lock:
+            snap = self._snapshot
+            if snap is None:
+                return
+            keep = np.ones(len(snap), dtype=bool)
+            for rid in resource_ids:
+                self.keywords.remove(str(rid))
+                self.suggestions.remove(str(rid))
+                i = snap.row(rid)
+                if i is not None:
+                    keep[i] = False
+            if keep.all():
+                return
+            self._snapshot = Snapshot(
+                snap.matrix[keep],
+                **{name: getattr(snap, name)[keep] for name in Snapshot.COLUMNS}
+            )
+
+
+_index = ResourceIndex()
+
+
+def get_index():
+    return _index
+
+
+def sync(*resource_ids):
+    """
+    Call after writing to the given resources: bumps the "resources" version
+    (invalidating search caches in every worker, which replay the change)
+    and re-reads them from Mongo into this worker's index.
+    """
+    if not resource_ids:
+        return
+    version = versions.bump("resources", changed=resource_ids)
+    if not _index.built:
+        return
+    _index.applied(version)
+    _index.refresh(resource_ids)
+
+
+def drop(*resource_ids):
+    """Removes deleted resources from the index (and bumps the version)."""
+    version = versions.bump("resources", changed=resource_ids)
+    _index.applied(version)
+    _index.remove([str(rid) for rid in resource_ids])
+
+
+def hydrate(resource_ids, *fields):
+    """Loads only the given resources (without embeddings), in the given order."""
+    qs = Resource.objects(id__in=[ObjectId(str(rid)) for rid in resource_ids])
+    if fields:
+        qs = qs.only(*fields)
+    by_id = {str(r.id): r for r in qs}
+    return [by_id[str(rid)] for rid in resource_ids if str(rid) in by_id]
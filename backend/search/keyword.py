@@ -0,0 +1,169 @@
+"""
+Inverted-index keyword engine with BM25 scoring.
+
+Documents are resources; text comes from the title, description, tags, unit
+and subject code/name. Query terms of three or more characters also match
+indexed terms they are a prefix of ("normal" -> "normalization").
+"""
+import math
+import re
+import threading
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in is it of on or the to with".split()
+)
+
+# Field weights act as repeated term frequency (BM25F-lite)
+FIELD_WEIGHTS = {'title': 3, 'tags': 2, 'subject': 2, 'unit': 1, 'description': 1}
+
+K1, B = 1.2, 0.75
+PREFIX_MIN_LEN = 3
+PREFIX_MAX_EXPANSIONS = 30
+PREFIX_DISCOUNT = 0.8
+
+
+VOWELS = frozenset('aeiouy')
+
+
+def _has_vowel(text):
+    return any(c in VOWELS for c in text)
+
+
+def stem(token):
+    """
+    Light, consistent suffix folding: one inflection (-s, -ies, -ed, -ied,
+    -ing) is removed, then a final "e", so every form of a word reduces to
+    the same term ("base", "bases", "based", "basing" -> "bas"; "boxes" ->
+    "boxe" -> "box").
+    """
+    if len(token) <= 2 or token.isdigit():
+        return token
+    if token.endswith(('ies', 'ied')) and len(token) > 4:
+        return token[:-3] + 'y'
+    for suffix in ('ing', 'ed'):
+        root = token[:-len(suffix)]
+        if token.endswith(suffix) and not token.endswith('eed') and len(root) >= 2 and _has_vowel(root):
+            # running -> run, stopped -> stop
+            if len(root) > 2 and root[-1] == root[-2] and root[-1] not in VOWELS and root[-1] not in 'lsz':
+                root = root[:-1]
+            return _drop_e(root)
+    if token.endswith('s') and not token.endswith(('ss', 'us', 'is')):
+        return _drop_e(token[:-1])
+    return _drop_e(token)
+
+
+def _drop_e(root):
+    return root[:-1] if root.endswith('e') and len(root) > 2 else root
+
+
+def analyze(text):
+    """Lower-cases, tokenizes, drops stopwords and stems."""
+    return [stem(t) for t in _TOKEN.findall((text or '').lower()) if t not in STOPWORDS]
+
+
+def document_terms(fields):
+    """Weighted term frequencies for a {field: text} mapping."""
+    tf = Counter()
+    for field, text in fields.items():
+        weight = FIELD_WEIGHTS.get(field, 1)
+        for term in analyze(text):
+            tf[term] += weight
+    return tf
+
+
+class KeywordIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.postings = defaultdict(dict)   # term -> {doc id: weighted tf}
+        self.doc_len = {}                   # doc id -> weighted length
+        self.doc_terms = {}                 # doc id -> terms (for removal)
+        self._total_len = 0
+        self._sorted_terms = None           # lazily rebuilt for prefix lookups
+
+    def __len__(self):
+        return len(self.doc_len)
+
+    def add(self, doc_id, fields):
+        tf = document_terms(fields)
+        with self._lock:
+            self._remove(doc_id)
+            for term, n in tf.items():
+                self.postings[term][doc_id] = n
+            self.doc_terms[doc_id] = tuple(tf)
+            self.doc_len[doc_id] = sum(tf.values())
+            self._total_len += self.doc_len[doc_id]
+            self._sorted_terms = None
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id):
+        for term in self.doc_terms.pop(doc_id, ()):
+            docs = self.postings.get(term)
+            if docs is not None:
+                docs.pop(doc_id, None)
+                if not docs:
+                    del self.postings[term]
+                    self._sorted_terms = None
+        self._total_len -= self.doc_len.pop(doc_id, 0)
+
+    def _expand(self, term):
+        """[(indexed term, weight)] a query term matches: itself plus prefix completions."""
+        matches = [(term, 1.0)] if term in self.postings else []
+        if len(term) < PREFIX_MIN_LEN:
+            return matches
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self.postings)
+        terms = self._sorted_terms
+        i = bisect_left(terms, term)
+        while i < len(terms) and terms[i].startswith(term) and len(matches) < PREFIX_MAX_EXPANSIONS:
+            if terms[i] != term:
+                matches.append((terms[i], PREFIX_DISCOUNT))
+            i += 1
+        return matches
+
+    def _idf(self, df):
+        n = len(self.doc_len)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def search(self, query):
+        """
+        {doc id: score in [0, 1]} for documents matching any query term.
+        Only the postings of matched terms are touched. The raw BM25 sum is
+        normalized by the sum of query-term IDFs, so a document containing
+        every term once at average length scores about 1 and partial
+        multi-word matches rank proportionally below it.
+        """
+        terms = list(dict.fromkeys(analyze(query)))
+        if not terms:
+            return {}
+
+        with self._lock:
+            if not self.doc_len:
+                return {}
+            avgdl = self._total_len / len(self.doc_len)
+            scores = defaultdict(float)
+            upper = 0.0
+            for term in terms:
+                expansions = self._expand(term)
+                if not expansions:
+                    upper += self._idf(0)
+                    continue
+                upper += max(self._idf(len(self.postings[t])) for t, _ in expansions)
+                best = {}
+                for t, weight in expansions:
+                    docs = self.postings[t]
+                    idf = self._idf(len(docs)) * weight
+                    for doc_id, tf in docs.items():
+                        norm = K1 * (1 - B + B * self.doc_len[doc_id] / avgdl)
+                        s = idf * tf * (K1 + 1) / (tf + norm)
+                        if s > best.get(doc_id, 0.0):
+                            best[doc_id] = s
+                for doc_id, s in best.items():
+                    scores[doc_id] += s
+
+        return {doc_id: min(s / upper, 1.0) for doc_id, s in scores.items()} if upper else {}
@@ -0,0 +1,17 @@
+import time
+from django.core.management.base import BaseCommand
+from search.neighbors import build_all
+
+class Command(BaseCommand):
+    help = 'Recomputes the resource_neighbors table (top-N similar resources per resource) used by recommendations.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--block-size', type=int, default=512,
+                            help='Number of resources scored per matrix multiplication.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.NOTICE('Building neighbor lists...'))
+        start = time.perf_counter()
+        count = build_all(block_size=options['block_size'])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f'Wrote neighbor lists for {count} resources in {elapsed:.1f}s.'))
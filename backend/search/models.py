@@ -1,3 +1,34 @@
-from django.db import models
+import mongoengine as me
+from datetime import datetime
 
-# Create your models here.
+
+class Neighbor(me.EmbeddedDocument):
+    """One precomputed recommendation, denormalized so it can be served as-is."""
+    resource_id = me.ObjectIdField(required=True)
+    score = me.FloatField(required=True)
+    semester = me.IntField()
+    subject_id = me.ObjectIdField()
+    subject_code = me.StringField()
+    title = me.StringField()
+    resource_type = me.StringField()
+    file_format = me.StringField()
+    file_path = me.StringField()
+    url = me.StringField()
+
+
+class ResourceNeighbors(me.Document):
+    """Top-N most similar approved resources for one resource, best first."""
+    resource_id = me.ObjectIdField(required=True, unique=True)
+    semester = me.IntField()
+    subject_id = me.ObjectIdField()
+    neighbors = me.EmbeddedDocumentListField(Neighbor)
+    # Score of the N-th neighbor; -1 while the list has room
+    min_score = me.FloatField(default=-1.0)
+    # True when the list holds every candidate, so a short list is final
+    complete = me.BooleanField(default=False)
+    updated_at = me.DateTimeField(default=datetime.utcnow)
+
+    meta = {
+        "collection": "resource_neighbors",
+        "indexes": ["neighbors.resource_id"],
+    }
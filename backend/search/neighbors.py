@@ -0,0 +1,227 @@
+"""
+Precomputed top-N neighbour lists for RecommendView.
+
+`build_all()` recomputes every list with blocked matrix multiplication over
+the resource index; `patch()` / `remove()` keep the table current when
+resources are (re-)embedded, approved, rejected or deleted. Every
+write bumps the "neighbors" stamp, which keys RecommendView's cache.
+"""
+from datetime import datetime
+
+import numpy as np
+from bson import ObjectId
+from django.conf import settings
+from pymongo import ReplaceOne, UpdateOne
+
+from core import versions
+from repository.models import Resource
+from repository.refcache import refs
+from .index import get_index
+from .models import Neighbor, ResourceNeighbors
+
+NEIGHBOR_FIELDS = ('title', 'semester', 'subject_id', 'resource_type', 'file_format', 'file_path', 'url')
+
+
+def _top_n():
+    return getattr(settings, 'RECOMMEND_NEIGHBORS', 50)
+
+
+def _code(subjects, subject_id):
+    subject = subjects.get(subject_id)
+    return subject.code if subject else None
+
+
+def _entries(resource_ids):
+    """resource id -> denormalized Neighbor fields for the given approved resources."""
+    resources = Resource.objects(id__in=[ObjectId(r) for r in resource_ids]).only(*NEIGHBOR_FIELDS)
+    resources = list(resources)
+    subjects = refs.subjects()
+    return {
+        str(r.id): {
+            'resource_id': r.id, 'title': r.title, 'semester': r.semester,
+            'subject_id': r.subject_id, 'subject_code': _code(subjects, r.subject_id),
+            'resource_type': r.resource_type, 'file_format': r.file_format,
+            'file_path': r.file_path, 'url': r.url,
+        }
+        for r in resources
+    }
+
+
+def _document(snap, row, ranked, entries, complete):
+    """
+    ResourceNeighbors for index row `row` from [(resource id, score), ...];
+    `complete` says `ranked` covers every candidate.
+    """
+    neighbors = [Neighbor(score=round(score, 6), **entries[rid]) for rid, score in ranked if rid in entries]
+    return ResourceNeighbors(
+        resource_id=ObjectId(snap.ids[row]),
+        semester=int(snap.semester[row]),
+        subject_id=ObjectId(snap.subject_id[row]),
+        neighbors=neighbors,
+        min_score=neighbors[-1].score if len(neighbors) >= _top_n() else -1.0,
+        complete=complete,
+        updated_at=datetime.utcnow(),
+    )
+
+
+def build_all(block_size=512):
+    """
+    Recomputes the whole table. Targets are all indexed resources with a
+    vector; candidates are approved ones. Scores are computed `block_size`
+    targets at a time so memory stays at block_size x candidates.
+    Returns the number of lists written.
+    """
+    snap = get_index().snapshot()
+    n = _top_n()
+    cand = np.flatnonzero(snap.mask(with_vector=True))
+    targets = np.flatnonzero(snap.mask(status=None, with_vector=True))
+    if not len(targets):
+        ResourceNeighbors.objects.delete()
+        return 0
+
+    cand_ids = snap.ids[cand]
+    cand_pos = {rid: j for j, rid in enumerate(cand_ids)}
+    entries = _entries(cand_ids.tolist())
+    cand_matrix = snap.matrix[cand]
+    # The target itself scores -inf and is dropped below, so no room is reserved for it
+    k = min(n, len(cand))
+
+    ops = []
+    for start in range(0, len(targets), block_size):
+        block = targets[start:start + block_size]
+        scores = snap.matrix[block] @ cand_matrix.T
+        for b, row in enumerate(block):
+            j = cand_pos.get(snap.ids[row])
+            if j is not None:
+                scores[b, j] = -np.inf    # never recommend a resource to itself
+
+        if k:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind='stable')
+            top = np.take_along_axis(top, order, axis=1)
+        else:
+            top = np.zeros((len(block), 0), dtype=int)
+
+        for b, row in enumerate(block):
+            ranked = [(cand_ids[j], float(scores[b, j])) for j in top[b] if np.isfinite(scores[b, j])]
+            others = len(cand) - (snap.ids[row] in cand_pos)
+            doc = _document(snap, row, ranked, entries, complete=others <= n)
+            ops.append(ReplaceOne({'resource_id': doc.resource_id}, doc.to_mongo(), upsert=True))
+
+    coll = ResourceNeighbors._get_collection()
+    for i in range(0, len(ops), 1000):
+        coll.bulk_write(ops[i:i + 1000], ordered=False)
+    coll.delete_many({'resource_id': {'$nin': [ObjectId(r) for r in snap.ids[targets]]}})
+    versions.bump("neighbors")
+    return len(targets)
+
+
+def patch(*resource_ids, block_size=512):
+    """
+    Incremental update after resources' embeddings or statuses changed:
+    rewrites their own lists and inserts each approved one into every other
+    stored list (pending targets included) where it now ranks in the top N.
+    A batch shares one snapshot, one floors query, one bulk write and one
+    stamp bump; scores are computed `block_size` resources at a time.
+    Insertions are single atomic `$push`/`$sort`/`$slice` updates, so
+    concurrent patches never overwrite each other. `min_score` is only
+    raised by full rebuilds, which keeps it a safe lower bound.
+    """
+    try:
+        snap = get_index().snapshot()
+        rows, gone = [], []
+        for rid in dict.fromkeys(str(r) for r in resource_ids):
+            row = snap.row(rid)
+            if row is None or not snap.has_vec[row]:
+                gone.append(rid)
+            else:
+                rows.append(row)
+        if gone:
+            remove(*gone)
+        if not rows:
+            return
+
+        n = _top_n()
+        coll = ResourceNeighbors._get_collection()
+        oids = [ObjectId(snap.ids[row]) for row in rows]
+        coll.update_many({'neighbors.resource_id': {'$in': oids}},
+                         {'$pull': {'neighbors': {'resource_id': {'$in': oids}}}, '$set': {'min_score': -1.0}})
+
+        # Own lists
+        cand = np.flatnonzero(snap.mask(with_vector=True))
+        cand_matrix = snap.matrix[cand]
+        own = {}
+        for start in range(0, len(rows), block_size):
+            block = rows[start:start + block_size]
+            scores = snap.matrix[block] @ cand_matrix.T
+            for b, row in enumerate(block):
+                keep = cand != row
+                others, row_scores = cand[keep], scores[b][keep]
+                top = np.argsort(-row_scores, kind='stable')[:n]
+                own[row] = ([(snap.ids[others[j]], float(row_scores[j])) for j in top], len(others) <= n)
+        wanted = {rid for ranked, _ in own.values() for rid, _ in ranked}
+        entries = _entries(list(wanted | {snap.ids[row] for row in rows}))
+        ops = []
+        for row, (ranked, complete) in own.items():
+            doc = _document(snap, row, ranked, entries, complete=complete)
+            ops.append(ReplaceOne({'resource_id': doc.resource_id}, doc.to_mongo(), upsert=True))
+
+        # Every other list (any target status) an approved one now belongs to;
+        # the patched resources' own lists were just rebuilt from all candidates
+        movers = [row for row in rows if snap.status[row] == 'approved' and snap.ids[row] in entries]
+        targets = np.setdiff1d(np.flatnonzero(snap.mask(status=None, with_vector=True)), rows)
+        if movers and len(targets):
+            target_oids = [ObjectId(rid) for rid in snap.ids[targets]]
+            floors = {
+                d['resource_id']: d.get('min_score', -1.0)
+                for d in coll.find({'resource_id': {'$in': target_oids}}, {'resource_id': 1, 'min_score': 1})
+            }
+            stored = [t for t, oid in enumerate(target_oids) if oid in floors]
+            floor = np.array([floors[target_oids[t]] for t in stored])
+            full = f'neighbors.{n - 1}'
+            now = datetime.utcnow()
+            for start in range(0, len(movers), block_size):
+                block = movers[start:start + block_size]
+                scores = snap.matrix[targets[stored]] @ snap.matrix[block].T
+                for t, m in zip(*np.nonzero(scores > floor[:, None])):
+                    oid, mover = target_oids[stored[t]], block[m]
+                    neighbor = Neighbor(score=round(float(scores[t, m]), 6), **entries[snap.ids[mover]]).to_mongo()
+                    push = {'neighbors': {'$each': [neighbor], '$sort': {'score': -1}, '$slice': n}}
+                    absent = {'resource_id': oid, 'neighbors.resource_id': {'$ne': neighbor['resource_id']}}
+                    # Exactly one of the two applies: a list with room keeps its flag,
+                    # a full one drops an entry and so no longer holds every candidate
+                    ops.append(UpdateOne({**absent, full: {'$exists': False}},
+                                         {'$push': push, '$set': {'updated_at': now}}))
+                    ops.append(UpdateOne({**absent, full: {'$exists': True}},
+                                         {'$push': push, '$set': {'complete': False, 'updated_at': now}}))
+
+        for i in range(0, len(ops), 1000):
+            coll.bulk_write(ops[i:i + 1000], ordered=True)
+        versions.bump("neighbors")
+    except Exception as e:
+        print(f'[Search] Neighbor patch failed for {len(resource_ids)} resource(s): {e}')
+
+
+def remove(*resource_ids):
+    """
+    Drops the given resources' lists and removes them from every other list.
+    A complete list stays complete (they are no longer candidates); a full
+    one is left short and not complete, so RecommendView falls back to live.
+    """
+    oids = [ObjectId(str(r)) for r in resource_ids]
+    coll = ResourceNeighbors._get_collection()
+    coll.delete_many({'resource_id': {'$in': oids}})
+    coll.update_many({'neighbors.resource_id': {'$in': oids}},
+                     {'$pull': {'neighbors': {'resource_id': {'$in': oids}}}, '$set': {'min_score': -1.0}})
+    versions.bump("neighbors")
+
+
+def rename_subject(subject_id, code):
+    """Refreshes the denormalized subject code after a subject edit."""
+    ResourceNeighbors._get_collection().update_many(
+        {'neighbors.subject_id': subject_id},
+        {'$set': {'neighbors.$[n].subject_code': code}},
+        array_filters=[{'n.subject_id': subject_id}],
+    )
+    versions.bump("neighbors")
@@ -0,0 +1,161 @@
+"""
+Typeahead suggestions from an in-memory prefix index.
+
+Every suggestion (resource title, tag, subject code/name) is stored under
+one key per word start, e.g. "binary search trees" is findable as "bin",
+"sea" and "tre". Keys live in one sorted list, so a lookup is a bisect plus
+a short scan; a full build sorts the list once (load()). Popular past queries are counted per role scope.
+"""
+import threading
+from bisect import bisect_left, insort
+from collections import Counter
+
+KIND_RANK = {'query': 0, 'subject': 1, 'title': 2, 'tag': 3}
+MAX_SCAN = 400           # visible candidates ranked per lookup
+MAX_SCAN_ENTRIES = 20000  # entries examined per lookup, visible or not
+MAX_QUERIES_PER_SCOPE = 500
+
+
+def _norm(text):
+    return ' '.join((text or '').lower().split())
+
+
+def _keys(text):
+    """Every word-start suffix of the normalized text."""
+    words = _norm(text).split(' ')
+    return {' '.join(words[i:]) for i in range(len(words)) if words[i]}
+
+
+class SuggestIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (key, owner, kind, text, semester, subject_id) sorted by key
+        self._entries = []
+        self._owned = {}       # owner -> [entry, ...]
+        self._queries = {}     # scope -> Counter(normalized query)
+
+    def _make(self, owner, kind, text, semester, subject_id):
+        entries = [(key, owner, kind, text, semester, subject_id) for key in _keys(text)]
+        self._owned.setdefault(owner, []).extend(entries)
+        return entries
+
+    def _add(self, *item):
+        for entry in self._make(*item):
+            insort(self._entries, entry)
+
+    def _remove(self, owner):
+        for entry in self._owned.pop(owner, ()):
+            i = bisect_left(self._entries, entry)
+            if i < len(self._entries) and self._entries[i] == entry:
+                del self._entries[i]
+
+    @staticmethod
+    def _resource_items(resource):
+        if resource.status != 'approved':
+            return
+        scope = (resource.semester, str(resource.subject_id))
+        owner = f"r:{resource.id}"
+        yield (owner, 'title', resource.title, *scope)
+        for tag in resource.tags or []:
+            yield (owner, 'tag', tag, *scope)
+
+    @staticmethod
+    def _subject_items(subject):
+        owner = f"s:{subject.id}"
+        yield (owner, 'subject', subject.code, subject.semester, str(subject.id))
+        yield (owner, 'subject', subject.name, subject.semester, str(subject.id))
+
+    def load(self, resources, subjects):
+        """Indexes subjects and resources in bulk: one sort instead of an insort per key."""
+        entries = []
+        with self._lock:
+            for subject in subjects:
+                for item in self._subject_items(subject):
+                    entries += self._make(*item)
+            for resource in resources:
+                for item in self._resource_items(resource):
+                    entries += self._make(*item)
+            entries.sort()
+            self._entries = entries
+
+    def set_resource(self, resource):
+        """(Re)indexes an approved resource's title and tags; drops anything else."""
+        with self._lock:
+            self._remove(f"r:{resource.id}")
+            for item in self._resource_items(resource):
+                self._add(*item)
+
+    def set_subject(self, subject):
+        with self._lock:
+            self._remove(f"s:{subject.id}")
+            for item in self._subject_items(subject):
+                self._add(*item)
+
+    def remove(self, owner_id):
+        with self._lock:
+            self._remove(f"r:{owner_id}")
+            self._remove(f"s:{owner_id}")
+
+    def adopt_queries(self, other):
+        """Carries popular-query counts over from a previous index."""
+        with other._lock:
+            self._queries = {scope: Counter(c) for scope, c in other._queries.items()}
+
+    def record_query(self, scope, q):
+        """Counts a search that returned results, for 'popular query' suggestions."""
+        q = _norm(q)
+        if not q:
+            return
+        with self._lock:
+            counts = self._queries.setdefault(scope, Counter())
+            counts[q] += 1
+            if len(counts) > 2 * MAX_QUERIES_PER_SCOPE:
+                self._queries[scope] = Counter(dict(counts.most_common(MAX_QUERIES_PER_SCOPE)))
+
+    def suggest(self, prefix, scope, visible, limit=8):
+        """
+        Up to `limit` suggestions starting (at a word boundary) with `prefix`.
+        `visible(semester, subject_id)` applies the caller's role scoping.
+        """
+        prefix = _norm(prefix)
+        if not prefix:
+            return []
+
+        with self._lock:
+            popular = [
+                (q, n) for q, n in self._queries.get(scope, Counter()).items()
+                if q.startswith(prefix)
+            ]
+            # Role scoping is applied while scanning, so entries the caller
+            # cannot see do not use up the candidate budget
+            matches = []
+            i = bisect_left(self._entries, (prefix,))
+            end = min(len(self._entries), i + MAX_SCAN_ENTRIES)
+            while i < end and len(matches) < MAX_SCAN and self._entries[i][0].startswith(prefix):
+                entry = self._entries[i]
+                if visible(entry[4], entry[5]):
+                    matches.append(entry)
+                i += 1
+
+        popular.sort(key=lambda x: -x[1])
+        out, seen = [], set()
+        for q, _ in popular[:max(limit // 2, 1)]:
+            if q not in seen:
+                seen.add(q)
+                out.append({"text": q, "kind": "query"})
+
+        # Whole-text prefix matches first, then by kind, then shortest
+        matches.sort(key=lambda e: (e[0] != _norm(e[3]), KIND_RANK[e[2]], len(e[3])))
+        for key, owner, kind, text, semester, subject_id in matches:
+            if len(out) >= limit:
+                break
+            if text.lower() in seen:
+                continue
+            seen.add(text.lower())
+            item = {"text": text, "kind": kind}
+            if kind == 'subject':
+                item["subject_id"] = subject_id
+            elif kind == 'title':
+                item["resource_id"] = owner[2:]
+            out.append(item)
+        return out[:limit]
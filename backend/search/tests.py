@@ -1,3 +1,155 @@
-from django.test import TestCase
+from types import SimpleNamespace
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from .keyword import KeywordIndex, analyze, stem
+from .suggest import SuggestIndex
+
+
+def resource(rid, title, tags=(), status="approved", semester=3, subject_id="s1"):
+    return SimpleNamespace(id=rid, title=title, tags=list(tags), status=status,
+                           semester=semester, subject_id=subject_id)
+
+
+def subject(sid, code, name, semester=3):
+    return SimpleNamespace(id=sid, code=code, name=name, semester=semester)
+
+
+def everyone(semester, subject_id):
+    return True
+
+
+class SuggestIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = SuggestIndex()
+        self.index.load(
+            [
+                resource("r1", "Binary Search Trees", tags=["graphs"]),
+                resource("r2", "Searching and Sorting", semester=4, subject_id="s2"),
+                resource("r3", "Pending Notes", status="pending"),
+            ],
+            [subject("s1", "CS301", "Data Structures")],
+        )
+
+    def texts(self, prefix, visible=everyone, scope=None):
+        return [s["text"] for s in self.index.suggest(prefix, scope, visible)]
+
+    def test_matches_any_word_start(self):
+        self.assertEqual(self.texts("tre"), ["Binary Search Trees"])
+        self.assertEqual(self.texts("graph"), ["graphs"])
+        self.assertEqual(self.texts("cs3"), ["CS301"])
+
+    def test_whole_text_prefix_ranks_first(self):
+        self.assertEqual(self.texts("search"), ["Searching and Sorting", "Binary Search Trees"])
+
+    def test_only_approved_resources(self):
+        self.assertEqual(self.texts("pend"), [])
+
+    def test_visibility_filter(self):
+        only_sem3 = lambda semester, subject_id: semester == 3
+        self.assertEqual(self.texts("search", visible=only_sem3), ["Binary Search Trees"])
+
+    def test_hidden_entries_do_not_exhaust_the_scan(self):
+        from .suggest import MAX_SCAN
+        hidden = [resource(f"h{i}", f"alpha {i:04d}", semester=5) for i in range(MAX_SCAN + 50)]
+        self.index.load(hidden + [resource("v1", "alpha zulu")], [])
+        only_sem3 = lambda semester, subject_id: semester == 3
+        self.assertEqual(self.texts("alpha", visible=only_sem3), ["alpha zulu"])
+
+    def test_blank_prefix(self):
+        self.assertEqual(self.texts("  "), [])
+
+    def test_load_matches_incremental_inserts(self):
+        incremental = SuggestIndex()
+        for s in [subject("s1", "CS301", "Data Structures")]:
+            incremental.set_subject(s)
+        for r in [resource("r1", "Binary Search Trees", tags=["graphs"]),
+                  resource("r2", "Searching and Sorting", semester=4, subject_id="s2")]:
+            incremental.set_resource(r)
+        self.assertEqual(incremental._entries, self.index._entries)
+
+    def test_set_resource_replaces_and_drops(self):
+        self.index.set_resource(resource("r1", "AVL Trees"))
+        self.assertEqual(self.texts("avl"), ["AVL Trees"])
+        self.assertEqual(self.texts("binary"), [])
+        self.index.set_resource(resource("r1", "AVL Trees", status="rejected"))
+        self.assertEqual(self.texts("avl"), [])
+
+    def test_remove(self):
+        self.index.remove("s1")
+        self.assertEqual(self.texts("cs3"), [])
+
+    def test_popular_queries_first_per_scope(self):
+        for _ in range(3):
+            self.index.record_query("student:3", "Search trees")
+        suggestions = self.index.suggest("sea", "student:3", everyone)
+        self.assertEqual(suggestions[0], {"text": "search trees", "kind": "query"})
+        self.assertNotIn("query", [s["kind"] for s in self.index.suggest("sea", "hod", everyone)])
+
+    def test_adopt_queries(self):
+        self.index.record_query("hod", "graphs")
+        fresh = SuggestIndex()
+        fresh.adopt_queries(self.index)
+        self.assertEqual(fresh.suggest("gra", "hod", everyone), [{"text": "graphs", "kind": "query"}])
+
+
+class StemTests(SimpleTestCase):
+    def test_word_forms_share_a_term(self):
+        for forms in (
+            ["base", "bases", "based", "basing"],
+            ["cache", "caches", "cached", "caching"],
+            ["tree", "trees"],
+            ["process", "processes", "processed", "processing"],
+            ["query", "queries", "queried"],
+            ["run", "runs", "running"],
+            ["index", "indexes", "indexed", "indexing"],
+            ["need", "needs", "needed"],
+        ):
+            with self.subTest(forms=forms):
+                self.assertEqual(len({stem(f) for f in forms}), 1, [stem(f) for f in forms])
+
+    def test_words_left_alone(self):
+        for word in ("class", "analysis", "virus", "string", "os", "2024"):
+            with self.subTest(word=word):
+                self.assertEqual(stem(word), word)
+
+    def test_analyze_drops_stopwords(self):
+        self.assertEqual(analyze("The Trees of a Forest"), ["tre", "forest"])
+
+
+class KeywordIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = KeywordIndex()
+        self.index.add("r1", {"title": "Normalization in DBMS", "description": "1NF 2NF 3NF",
+                              "subject": "CS401 Database Systems"})
+        self.index.add("r2", {"title": "Sorting algorithms", "tags": "quicksort mergesort",
+                              "description": "normal forms are not covered"})
+        self.index.add("r3", {"title": "Operating Systems", "unit": "Unit 2"})
+
+    def test_scores_are_normalized(self):
+        scores = self.index.search("sorting algorithms")
+        self.assertEqual(max(scores, key=scores.get), "r2")
+        self.assertTrue(all(0 < s <= 1 for s in scores.values()))
+
+    def test_title_outweighs_description(self):
+        scores = self.index.search("normalization")
+        self.assertGreater(scores["r1"], scores.get("r2", 0))
+
+    def test_prefix_expansion(self):
+        self.assertIn("r1", self.index.search("normaliz"))
+        self.assertEqual(self.index.search("no"), {})   # too short to expand
+
+    def test_stemmed_forms_match(self):
+        self.assertIn("r2", self.index.search("sorted"))
+
+    def test_no_match(self):
+        self.assertEqual(self.index.search("compiler"), {})
+        self.assertEqual(self.index.search("the of"), {})
+
+    def test_remove_and_replace(self):
+        self.index.remove("r2")
+        self.assertNotIn("r2", self.index.search("sorting"))
+        self.assertEqual(len(self.index), 2)
+        self.index.add("r3", {"title": "Compiler Design"})
+        self.assertEqual(list(self.index.search("compiler")), ["r3"])
+        self.assertEqual(self.index.search("operating"), {})
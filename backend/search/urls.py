@@ -1,7 +1,9 @@
 from django.urls import path
-from .views import SearchView, RecommendView
+from .views import SearchView, BatchSearchView, SuggestView, RecommendView
 
 urlpatterns = [
     path('search/', SearchView.as_view()),
+    path('search/batch/', BatchSearchView.as_view()),
+    path('search/suggest/', SuggestView.as_view()),
     path('search/recommend/<str:resource_id>/', RecommendView.as_view()),
 ]
@@ -0,0 +1,23 @@
+import numpy as np
+
+
+def unit(vec):
+    """Returns `vec` as a float32 unit vector (zeros stay zeros)."""
+    v = np.asarray(vec, dtype=np.float32)
+    norm = np.linalg.norm(v)
+    return v / norm if norm else v
+
+
+def top_k(scores, k, min_score=None):
+    """
+    Indices of the `k` highest scores (>= min_score), best first.
+    Uses argpartition so only the selected k are sorted.
+    """
+    if k <= 0:
+        return np.array([], dtype=int)
+    idx = np.arange(len(scores))
+    if min_score is not None:
+        idx = idx[scores >= min_score]
+    if len(idx) > k:
+        idx = idx[np.argpartition(-scores[idx], k - 1)[:k]]
+    return idx[np.argsort(-scores[idx], kind='stable')]
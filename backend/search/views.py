@@ -1,19 +1,90 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from sklearn.metrics.pairwise import cosine_similarity
+from django.conf import settings
 import numpy as np
 from bson import ObjectId
 
-from repository.models import Resource, Subject
-from repository.views import serialize_resource
+from core import versions
+from repository.refcache import refs
+from repository.views import serialize_resources
+from . import cache
+from .index import get_index, hydrate
+from .models import Neighbor, ResourceNeighbors
+from .utils import unit, top_k
+
+
+MIN_SCORE = 0.2
+
+
+def semantic_scores(snap, rows, query_vecs):
+    """
+    (queries x rows) cosine similarities as one matrix product of unit vectors.
+    `query_vecs` is a (d,) vector or an (m, d) matrix of unit rows.
+    """
+    query_vecs = np.asarray(query_vecs, dtype=np.float32)
+    if snap.dim != query_vecs.shape[-1]:
+        return np.zeros(query_vecs.shape[:-1] + (len(rows),), dtype=np.float32)
+    return query_vecs @ snap.matrix[rows].T
+
+
+def hybrid_scores(index, snap, rows, q, semantic):
+    """Blends one query's semantic scores over `rows` with its BM25 keyword score."""
+    # Keyword matching: BM25 over the inverted index, touching only matching postings
+    keyword = np.zeros(len(snap), dtype=np.float32)
+    for rid, score in index.keywords.search(q).items():
+        row = snap.row(rid)
+        if row is not None:
+            keyword[row] = score
+    keyword = keyword[rows]
+
+    # Best of: semantic alone, keyword alone (scaled by 0.6) and their weighted
+    # blend. This never exceeds max(semantic, keyword); the blend only lets a
+    # fair semantic score plus a strong keyword match rank above the 0.6 scale
+    blend = settings.SEARCH_KEYWORD_BLEND
+    return np.maximum(
+        np.maximum(semantic, keyword * 0.6),
+        (1 - blend) * semantic + blend * keyword,
+    )
+
+
+def search_facets(snap, rows, hit, refine_masks):
+    """
+    Vectorized counts per semester, subject and file format over the hits.
+    Each facet ignores its own refinement filter (see resource_facets).
+    """
+    columns = {
+        "semester": snap.semester[rows],
+        "subject": snap.subject_id[rows],
+        "file_format": np.where(snap.resource_type[rows] == "url", "url", snap.file_format[rows]),
+    }
+    facets = {}
+    for name, column in columns.items():
+        m = hit.copy()
+        for other, mask in refine_masks.items():
+            if other != name:
+                m &= mask
+        if name == "semester":
+            counts = np.bincount(column[m].astype(np.int64))
+            values = np.flatnonzero(counts)
+            counts = counts[values]
+        else:
+            values, counts = np.unique(column[m].astype(str), return_counts=True)
+        order = np.argsort(-counts, kind='stable')
+        facets[name] = [
+            {"value": values[i].item() if name == "semester" else str(values[i]), "count": int(counts[i])}
+            for i in order
+        ]
+    return facets
 
 
 class SearchView(APIView):
     """
     GET: Hybrid semantic search.
-    Embeds the query and calculates cosine similarity with resource embeddings.
-    Falls back to keyword matching if no embedding is present.
+    Embeds the query and calculates cosine similarity with resource embeddings,
+    blended with BM25 keyword relevance (title, description, tags, unit, subject).
+    Scores run against the in-memory resource index; only the hits are loaded.
+    `?facets=1` adds per-semester/subject/format counts over the hits.
     """
     permission_classes = [IsAuthenticated]
 
@@ -22,153 +93,312 @@ class SearchView(APIView):
         if not q:
             return Response({"error": "Search query 'q' is required."}, status=400)
 
-        # Base queryset — approved only
-        qs = Resource.objects(status='approved')
+        # Role scope — approved only
+        scope = {"status": "approved"}
+        refine = {}
 
         # Apply filters
         if request.user.role == "student":
-            qs = qs.filter(semester=request.user.semester)
+            scope["semester"] = request.user.semester
         elif request.user.role == "faculty":
-            qs = qs.filter(subject_id__in=request.user.subject_ids)
+            scope["subject_ids"] = request.user.subject_ids
         elif semester := request.query_params.get('semester'):
             try:
-                qs = qs.filter(semester=int(semester))
+                refine["semester"] = int(semester)
             except ValueError:
                 return Response({"error": "Invalid semester parameter."}, status=400)
-        
+
         if subject := request.query_params.get('subject'):
             try:
-                qs = qs.filter(subject_id=ObjectId(subject))
+                refine["subject"] = ObjectId(subject)
             except Exception:
                 return Response({"error": "Invalid subject ID."}, status=400)
-        
+
         if fmt := request.query_params.get('file_format'):
-            if fmt == "url":
-                qs = qs.filter(resource_type="url")
-            else:
-                qs = qs.filter(file_format=fmt)
-
-        resources = list(qs)
-        if not resources:
-            return Response({"query": q, "count": 0, "results": []})
-
-        # Embed the query
-        from rag.embedder import embed
-        query_embedding = embed(q)
-
-
-        # Score resources with embeddings
-        scored = []
-        MIN_SCORE = 0.2
-        
-        for r in resources:
-            semantic_score = 0.0
-            if r.embedding:
-                sim = cosine_similarity(
-                    [query_embedding],
-                    [np.array(r.embedding)]
-                )[0][0]
-                semantic_score = float(sim)
-            
-            # Keyword matching (gives a boost or acts as fallback)
-            keyword_score = 1.0 if q.lower() in r.title.lower() or q.lower() in (r.description or "").lower() else 0.0
-            
-            # Hybrid score: weight semantic highly, but let keywords override if strong
-            final_score = max(semantic_score, keyword_score * 0.6)
-            
-            if final_score >= MIN_SCORE:
-                scored.append((r, final_score))
-
-
-
-
-        # Sort by score descending
-        scored.sort(key=lambda x: x[1], reverse=True)
+            refine["file_format"] = fmt
+
+        try:
+            page = max(int(request.query_params.get('page', 1)), 1)
+            page_size = int(request.query_params.get('page_size', settings.SEARCH_PAGE_SIZE))
+        except ValueError:
+            return Response({"error": "Invalid page parameter."}, status=400)
+        page_size = max(1, min(page_size, settings.SEARCH_MAX_PAGE_SIZE))
+        with_facets = request.query_params.get('facets') in ('1', 'true')
+
+        # Identical searches within the same scope are served from memory until
+        # any resource write bumps the version
+        version, = versions.current("resources", max_age=settings.SEARCH_VERSION_POLL_SECONDS)
+        cache_key = (
+            "search", version, cache.normalize_query(q), cache.user_scope(request.user),
+            tuple(sorted((k, str(v)) for k, v in refine.items())), page, page_size, with_facets,
+        )
+        if (cached := cache.results.get(cache_key)) is not None:
+            if cached["count"]:
+                get_index().suggestions.record_query(cache.user_scope(request.user), q)
+            return Response(cached)
+
+        index = get_index()
+        snap = index.snapshot()
+        rows = np.flatnonzero(snap.mask(**scope))
+        if not len(rows):
+            return Response({"query": q, "count": 0, "page": page, "page_size": page_size, "results": []})
+
+        # Refinement filters are applied after scoring so facets can relax them
+        refine_masks = {}
+        for name, value in refine.items():
+            field = "subject_id" if name == "subject" else name
+            refine_masks[name] = snap.mask(status=None, **{field: value})[rows]
+        selected = np.ones(len(rows), dtype=bool)
+        for mask in refine_masks.values():
+            selected &= mask
+
+        semantic = semantic_scores(snap, rows, unit(cache.embed_query(q)))
+        final = hybrid_scores(index, snap, rows, q, semantic)
+        hit = final >= MIN_SCORE
+
+        # Only the requested page is selected (argpartition top-k) and serialized
+        ranked = np.where(selected, final, -np.inf)
+        hits = int(np.count_nonzero(hit & selected))
+        top = top_k(ranked, page * page_size, min_score=MIN_SCORE)[(page - 1) * page_size:]
+        scores = {snap.ids[rows[i]]: float(final[i]) for i in top}
+
+        results = serialize_resources(hydrate(list(scores)))
+        for item in results:
+            item['similarity_score'] = round(scores[item['id']], 4)
+
+        data = {
+            "query": q,
+            "count": hits,
+            "page": page,
+            "page_size": page_size,
+            "has_next": page * page_size < hits,
+            "min_score": MIN_SCORE,
+            "score_cutoff": round(float(final[top[-1]]), 4) if len(top) else None,
+            "results": results,
+        }
+        if with_facets:
+            data["facets"] = search_facets(snap, rows, hit, refine_masks)
+        cache.results.set(cache_key, data)
+        if hits:
+            index.suggestions.record_query(cache.user_scope(request.user), q)
+        return Response(data)
+
+
+class BatchSearchView(APIView):
+    """
+    POST: Many searches with shared filters in one call.
+    All queries are embedded in one forward pass and scored against the
+    in-scope resources with a single matrix-matrix product.
+    Body: {"queries": [...], "semester", "subject", "file_format", "top_k"}
+    """
+    permission_classes = [IsAuthenticated]
+    MAX_QUERIES = 64
+    MAX_TOP_K = 50
+
+    def post(self, request):
+        data = request.data
+        queries = data.get('queries')
+        if not isinstance(queries, list) or not queries:
+            return Response({"error": "'queries' must be a non-empty list."}, status=400)
+        queries = [str(q).strip() for q in queries]
+        if len(queries) > self.MAX_QUERIES:
+            return Response({"error": f"At most {self.MAX_QUERIES} queries per batch."}, status=400)
+        if not all(queries):
+            return Response({"error": "Queries must not be empty."}, status=400)
+
+        try:
+            k = max(1, min(int(data.get('top_k', 10)), self.MAX_TOP_K))
+        except (TypeError, ValueError):
+            return Response({"error": "Invalid top_k parameter."}, status=400)
+
+        filters = {"status": "approved"}
+        if request.user.role == "student":
+            filters["semester"] = request.user.semester
+        elif request.user.role == "faculty":
+            filters["subject_ids"] = request.user.subject_ids
+        elif data.get('semester'):
+            try:
+                filters["semester"] = int(data['semester'])
+            except (TypeError, ValueError):
+                return Response({"error": "Invalid semester parameter."}, status=400)
+        if data.get('subject'):
+            try:
+                filters["subject_id"] = ObjectId(data['subject'])
+            except Exception:
+                return Response({"error": "Invalid subject ID."}, status=400)
+        filters["file_format"] = data.get('file_format') or None
+
+        index = get_index()
+        snap = index.snapshot()
+        rows = np.flatnonzero(snap.mask(**filters))
+        if not len(rows):
+            return Response({"results": [{"query": q, "count": 0, "results": []} for q in queries]})
+
+        query_vecs = np.stack([unit(v) for v in cache.embed_queries(queries)])
+        semantic = semantic_scores(snap, rows, query_vecs)
+
+        picked = []
+        for i, q in enumerate(queries):
+            final = hybrid_scores(index, snap, rows, q, semantic[i])
+            top = top_k(final, k, min_score=MIN_SCORE)
+            picked.append((int(np.count_nonzero(final >= MIN_SCORE)),
+                           [(snap.ids[rows[j]], float(final[j])) for j in top]))
+
+        # Hydrate every resource any query returned, once
+        wanted = list(dict.fromkeys(rid for _, top in picked for rid, _ in top))
+        serialized = {item['id']: item for item in serialize_resources(hydrate(wanted))}
 
         results = []
-        for resource, score in scored:
-            data = serialize_resource(resource)
-            data['similarity_score'] = round(score, 4)
-            results.append(data)
+        for q, (hits, top) in zip(queries, picked):
+            items = []
+            for rid, score in top:
+                if rid in serialized:
+                    items.append({**serialized[rid], "similarity_score": round(score, 4)})
+            results.append({"query": q, "count": hits, "results": items})
+
+        return Response({"results": results})
+
+
+class SuggestView(APIView):
+    """
+    GET: Typeahead suggestions for the search box (titles, tags, subjects and
+    popular past queries), from the in-memory prefix index. Role-scoped.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        q = request.query_params.get('q', '')
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 8)), 20))
+        except ValueError:
+            return Response({"error": "Invalid limit parameter."}, status=400)
 
+        user = request.user
+        if user.role == "student":
+            visible = lambda semester, subject_id: semester == user.semester
+        elif user.role == "faculty":
+            allowed = {str(s) for s in user.subject_ids}
+            visible = lambda semester, subject_id: subject_id in allowed
+        else:
+            visible = lambda semester, subject_id: True
+
+        suggestions = get_index().current_suggestions()
         return Response({
             "query": q,
-            "count": len(results),
-            "results": results,
+            "suggestions": suggestions.suggest(q, cache.user_scope(user), visible, limit),
         })
 
 
+def serialize_recommendation(rec, score):
+    """`rec` is a Neighbor or a hydrated Resource; both carry the same fields."""
+    data = {
+        "id": str(rec.resource_id if isinstance(rec, Neighbor) else rec.id),
+        "title": rec.title,
+        "subject_code": rec.subject_code if isinstance(rec, Neighbor) else None,
+        "similarity_score": round(score, 4),
+    }
+    if rec.resource_type == 'file':
+        data['file_format'] = rec.file_format
+        data['file_url'] = f"http://localhost:8000/media/{rec.file_path}"
+    else:
+        data['url'] = rec.url
+    return data
+
+
 class RecommendView(APIView):
     """
     GET: Recommend 5 similar resources based on semantic similarity.
+    Served from the precomputed resource_neighbors list (one indexed read),
+    with role scoping applied as a post-filter. Falls back to scoring
+    against the resource index when no stored list can fill the page.
     """
     permission_classes = [IsAuthenticated]
+    LIMIT = 5
+
+    def in_scope(self, user, semester, subject_id):
+        if user.role == "student":
+            return semester == user.semester
+        if user.role == "faculty":
+            return subject_id in user.subject_ids
+        return True
 
     def get(self, request, resource_id):
+        # Neighbor lists are patched after the resource index is synced, so
+        # both stamps key the cache
+        stamps = versions.current("resources", "neighbors", max_age=settings.SEARCH_VERSION_POLL_SECONDS)
+        cache_key = ("recommend", *stamps, resource_id, cache.user_scope(request.user))
+        if (cached := cache.results.get(cache_key)) is not None:
+            return Response(cached)
+
+        response = self.recommend(request, resource_id)
+        if response.status_code == 200:
+            cache.results.set(cache_key, response.data)
+        return response
+
+    def recommend(self, request, resource_id):
         try:
-            target = Resource.objects.get(id=ObjectId(resource_id))
+            stored = ResourceNeighbors.objects(resource_id=ObjectId(resource_id)).first()
         except Exception:
             return Response({"error": "Resource not found."}, status=404)
 
-        if not target.embedding:
-            return Response({"error": "Resource has no embedding yet."}, status=400)
+        if stored is not None:
+            if not self.in_scope(request.user, stored.semester, stored.subject_id):
+                return Response({"error": "Resource not found."}, status=404)
+
+            picked = [
+                n for n in stored.neighbors
+                if self.in_scope(request.user, n.semester, n.subject_id)
+            ][:self.LIMIT]
+            # A short list after filtering is only final if it holds every candidate
+            if len(picked) == self.LIMIT or stored.complete:
+                return Response({
+                    "resource_id": str(resource_id),
+                    "recommendations": [serialize_recommendation(n, n.score) for n in picked],
+                })
 
-        if request.user.role == "student" and target.semester != request.user.semester:
+        return self.live(request, resource_id)
+
+    def live(self, request, resource_id):
+        snap = get_index().snapshot()
+        target = snap.row(resource_id)
+        if target is None:
             return Response({"error": "Resource not found."}, status=404)
-        elif request.user.role == "faculty" and target.subject_id not in request.user.subject_ids:
+
+        if not snap.has_vec[target]:
+            return Response({"error": "Resource has no embedding yet."}, status=400)
+
+        if not self.in_scope(request.user, snap.semester[target], ObjectId(snap.subject_id[target])):
             return Response({"error": "Resource not found."}, status=404)
 
         # All other approved resources with embeddings
-        candidates_qs = Resource.objects(
-            status='approved',
-            id__ne=target.id,
-            embedding__exists=True
-        )
         if request.user.role == "student":
-            candidates_qs = candidates_qs.filter(semester=request.user.semester)
+            mask = snap.mask(semester=request.user.semester, with_vector=True)
         elif request.user.role == "faculty":
-            candidates_qs = candidates_qs.filter(subject_id__in=request.user.subject_ids)
+            mask = snap.mask(subject_ids=request.user.subject_ids, with_vector=True)
+        else:
+            mask = snap.mask(with_vector=True)
+        mask[target] = False
+        rows = np.flatnonzero(mask)
 
-        candidates = candidates_qs
-
-        if not candidates:
+        if not len(rows):
             return Response({
-                "resource_id": str(target.id),
+                "resource_id": str(resource_id),
                 "recommendations": [],
             })
 
-        target_vec = np.array(target.embedding)
-        scored = []
-        for r in candidates:
-            sim = cosine_similarity([target_vec], [np.array(r.embedding)])[0][0]
-            scored.append((r, float(sim)))
-
-        scored.sort(key=lambda x: x[1], reverse=True)
-        top5 = scored[:5]
+        scores = snap.matrix[rows] @ snap.matrix[target]
+        top = {snap.ids[rows[i]]: float(scores[i]) for i in top_k(scores, self.LIMIT)}
 
+        resources = hydrate(list(top), 'title', 'subject_id', 'resource_type', 'file_format', 'file_path', 'url')
+        subjects = refs.subjects()
         recommendations = []
-        for resource, score in top5:
-            subject_code = None
-            try:
-                subject = Subject.objects.get(id=resource.subject_id)
-                subject_code = subject.code
-            except Exception:
-                pass
-
-            rec = {
-                "id": str(resource.id),
-                "title": resource.title,
-                "subject_code": subject_code,
-                "similarity_score": round(score, 4),
-            }
-            if resource.resource_type == 'file':
-                rec['file_format'] = resource.file_format
-                rec['file_url'] = f"http://localhost:8000/media/{resource.file_path}"
-            else:
-                rec['url'] = resource.url
+        for resource in resources:
+            rec = serialize_recommendation(resource, top[str(resource.id)])
+            subject = subjects.get(resource.subject_id)
+            rec["subject_code"] = subject.code if subject else None
             recommendations.append(rec)
 
         return Response({
-            "resource_id": str(target.id),
+            "resource_id": str(resource_id),
             "recommendations": recommendations,
         })
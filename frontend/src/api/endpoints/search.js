@@ -7,3 +7,7 @@ export const search = async (params) => {
 export const getRecommendations = async (resourceId) => {
     return api.get(`/search/recommend/${resourceId}/`).then((r) => r.data);
 };
+
+export const getSuggestions = async (q) => {
+    return api.get("/search/suggest/", { params: { q } }).then((r) => r.data);
+};
@@ -2,7 +2,7 @@ import { useQuery } from "@tanstack/react-query";
 import { getSubjects, getSemesters } from "../api/endpoints/subjects";
 import { useAuth } from "../context/AuthContext";
 
-export default function FilterBar({ filters, onFilter }) {
+export default function FilterBar({ filters, onFilter, facets }) {
     const { user } = useAuth();
     const { data: semData } = useQuery({
         queryKey: ["semesters"],
@@ -20,6 +20,13 @@ export default function FilterBar({ filters, onFilter }) {
     const semesters = semData?.semesters || [];
     const subjects = subData?.results || [];
 
+    // " (n)" after an option when the listing sent facet counts
+    const count = (facet, value) => {
+        if (!facets?.[facet]) return "";
+        const bucket = facets[facet].find((b) => String(b.value) === String(value));
+        return ` (${bucket?.count || 0})`;
+    };
+
     const handle = (key, val) => {
         const newFilters = { ...filters, [key]: val || undefined };
         if (key === "semester") {
@@ -39,7 +46,7 @@ export default function FilterBar({ filters, onFilter }) {
                     <option value="">All Semesters</option>
                     {semesters.map((s) => (
                         <option key={s} value={s}>
-                            Semester {s}
+                            Semester {s}{count("semester", s)}
                         </option>
                     ))}
                 </select>
@@ -53,7 +60,7 @@ export default function FilterBar({ filters, onFilter }) {
                 <option value="">All Subjects</option>
                 {subjects.map((s) => (
                     <option key={s.id} value={s.id}>
-                        {s.code} — {s.name}
+                        {s.code} — {s.name}{count("subject", s.id)}
                     </option>
                 ))}
             </select>
@@ -66,7 +73,7 @@ export default function FilterBar({ filters, onFilter }) {
                 <option value="">All Formats</option>
                 {["pdf", "ppt", "doc", "image", "url"].map((f) => (
                     <option key={f} value={f}>
-                        {f.toUpperCase()}
+                        {f.toUpperCase()}{count("file_format", f)}
                     </option>
                 ))}
             </select>
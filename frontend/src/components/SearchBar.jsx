@@ -1,13 +1,36 @@
 import { useState, useEffect } from "react";
+import { useQuery } from "@tanstack/react-query";
+import { getSuggestions } from "../api/endpoints/search";
+
+const KIND_ICONS = { query: "🕘", subject: "📚", title: "📄", tag: "🏷️" };
 
 export default function SearchBar({ onSearch }) {
     const [value, setValue] = useState("");
+    const [debounced, setDebounced] = useState("");
+    const [open, setOpen] = useState(false);
 
     useEffect(() => {
-        const timer = setTimeout(() => onSearch(value), 300);
+        const timer = setTimeout(() => {
+            setDebounced(value);
+            onSearch(value);
+        }, 300);
         return () => clearTimeout(timer);
     }, [value, onSearch]);
 
+    const prefix = debounced.trim();
+    const { data } = useQuery({
+        queryKey: ["suggest", prefix],
+        queryFn: () => getSuggestions(prefix),
+        enabled: prefix.length >= 2,
+        staleTime: 60000,
+    });
+    const suggestions = prefix.length >= 2 ? data?.suggestions || [] : [];
+
+    const pick = (text) => {
+        setValue(text);
+        setOpen(false);
+    };
+
     return (
         <div className="relative mb-4">
             <span className="absolute left-3 top-1/2 -translate-y-1/2 text-gray-400">
@@ -16,7 +39,13 @@ export default function SearchBar({ onSearch }) {
             <input
                 type="text"
                 value={value}
-                onChange={(e) => setValue(e.target.value)}
+                onChange={(e) => {
+                    setValue(e.target.value);
+                    setOpen(true);
+                }}
+                onFocus={() => setOpen(true)}
+                onBlur={() => setOpen(false)}
+                onKeyDown={(e) => e.key === "Escape" && setOpen(false)}
                 placeholder="Search resources by title, subject, or keyword..."
                 className="w-full pl-9 pr-4 py-2.5 border border-gray-200 rounded-xl text-sm bg-white focus:ring-2 focus:ring-accent focus:outline-none"
             />
@@ -28,6 +57,26 @@ export default function SearchBar({ onSearch }) {
                     ✕
                 </button>
             )}
+            {open && suggestions.length > 0 && (
+                <ul className="absolute z-20 mt-1 w-full bg-white border border-gray-200 rounded-xl shadow-lg py-1 text-sm">
+                    {suggestions.map((s) => (
+                        <li key={`${s.kind}-${s.text}`}>
+                            <button
+                                type="button"
+                                // mousedown fires before the input's blur closes the list
+                                onMouseDown={(e) => {
+                                    e.preventDefault();
+                                    pick(s.text);
+                                }}
+                                className="w-full text-left px-3 py-2 hover:bg-gray-50 flex items-center gap-2"
+                            >
+                                <span className="text-xs">{KIND_ICONS[s.kind]}</span>
+                                <span className="truncate">{s.text}</span>
+                            </button>
+                        </li>
+                    ))}
+                </ul>
+            )}
         </div>
     );
 }
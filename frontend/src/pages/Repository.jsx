@@ -1,5 +1,5 @@
 import { useState } from "react";
-import { useQuery, useQueryClient } from "@tanstack/react-query";
+import { useInfiniteQuery, useQueryClient } from "@tanstack/react-query";
 import { getResources, deleteResource } from "../api/endpoints/resources";
 import { search } from "../api/endpoints/search";
 import Layout from "../components/Layout";
@@ -19,33 +19,54 @@ export default function Repository() {
     const queryClient = useQueryClient();
 
 
-    const { data: browseData, isLoading: browseLoading } = useQuery({
+    // Listings are keyset-paginated: each page returns the cursor for the next
+    const {
+        data: browseData,
+        isLoading: browseLoading,
+        fetchNextPage: fetchMoreResources,
+        hasNextPage: hasMoreResources,
+        isFetchingNextPage: loadingMoreResources,
+    } = useInfiniteQuery({
         queryKey: ["resources", filters],
-        queryFn: () => getResources(filters),
+        queryFn: ({ pageParam }) =>
+            getResources(pageParam ? { ...filters, cursor: pageParam, total: 0 } : { ...filters, facets: 1 }),
+        initialPageParam: null,
+        getNextPageParam: (last) => last.next || undefined,
         enabled: !isSearching,
+        // Poll while any listed resource is still being indexed
+        refetchInterval: (query) =>
+            query.state.data?.pages.some((p) => p.results?.some((r) => r.indexing_status === "processing"))
+                ? 15000
+                : false,
     });
 
-    const { data: searchData, isLoading: searchLoading } = useQuery({
+    // Search results are paged; "Load more" fetches the next page
+    const {
+        data: searchData,
+        isLoading: searchLoading,
+        fetchNextPage: fetchMoreResults,
+        hasNextPage: hasMoreResults,
+        isFetchingNextPage: loadingMoreResults,
+    } = useInfiniteQuery({
         queryKey: ["search", searchQuery, filters],
-        queryFn: () => search({ q: searchQuery, ...filters }),
+        queryFn: ({ pageParam }) =>
+            search({ q: searchQuery, ...filters, page: pageParam, ...(pageParam === 1 && { facets: 1 }) }),
+        initialPageParam: 1,
+        getNextPageParam: (last) => (last.has_next ? last.page + 1 : undefined),
         enabled: isSearching,
     });
 
     const isLoading = isSearching ? searchLoading : browseLoading;
     const resources = isSearching
-        ? searchData?.results || []
-        : browseData?.results || [];
+        ? searchData?.pages.flatMap((p) => p.results || []) || []
+        : browseData?.pages.flatMap((p) => p.results || []) || [];
     
-    const total = isSearching ? searchData?.count || 0 : browseData?.count || 0;
-    const isProcessing = resources.some(r => r.indexing_status === "processing");
-
-    // Add polling to browse query if processing
-    useQuery({
-        queryKey: ["resources", filters],
-        queryFn: () => getResources(filters),
-        enabled: !isSearching && isProcessing,
-        refetchInterval: 15000,
-    });
+    const total = isSearching ? searchData?.pages[0]?.count || 0 : browseData?.pages[0]?.count || 0;
+    // Counts per filter value come with the first page
+    const facets = isSearching ? searchData?.pages[0]?.facets : browseData?.pages[0]?.facets;
+    const hasMore = isSearching ? hasMoreResults : hasMoreResources;
+    const loadingMore = isSearching ? loadingMoreResults : loadingMoreResources;
+    const loadMore = isSearching ? fetchMoreResults : fetchMoreResources;
 
 
 
@@ -83,7 +104,7 @@ export default function Repository() {
             </div>
 
             <SearchBar onSearch={setSearchQuery} />
-            <FilterBar filters={filters} onFilter={setFilters} />
+            <FilterBar filters={filters} onFilter={setFilters} facets={facets} />
 
             {isLoading ? (
                 <Spinner />
@@ -113,6 +134,18 @@ export default function Repository() {
                 </div>
             )}
 
+            {hasMore && (
+                <div className="flex justify-center mt-6">
+                    <button
+                        onClick={() => loadMore()}
+                        disabled={loadingMore}
+                        className="px-4 py-2 border border-gray-200 rounded-lg text-sm font-medium text-primary hover:bg-gray-50 transition disabled:opacity-50"
+                    >
+                        {loadingMore ? "Loading..." : `Load more (${resources.length} of ${total})`}
+                    </button>
+                </div>
+            )}
+
             {selected && (
                 <RecommendPanel
                     resource={selected}